@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+""" Compressed storage of api responses.
+
+Archive layout: header, the optional shared zlib dictionary, the compressed
+response bodies, then the offset table (key, offset, length, status for
+every page) that the header points to.
+"""
+from collections import Counter
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from liquiaoe.loaders import CASSETTE_DIR, LocalLoader, StoredResponse, read_cassette, tail
+
+MAGIC = b"LQAR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQI")
+ENTRY = struct.Struct("<QIH")
+KEY_LENGTH = struct.Struct("<H")
+DICTIONARY_LENGTH = struct.Struct("<I")
+HAS_DICTIONARY = 1
+# zlib only looks back 32K, so a larger dictionary is wasted
+DICTIONARY_SIZE = 32768
+
+
+class Codec:
+    """zlib compression, with a preset dictionary shared by all pages if given."""
+
+    def __init__(self, dictionary=None):
+        self.dictionary = dictionary or b""
+
+    def compress(self, body):
+        if self.dictionary:
+            compressor = zlib.compressobj(9, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(9)
+        return compressor.compress(body) + compressor.flush()
+
+    def decompress(self, data):
+        if self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+def train_dictionary(bodies, size=DICTIONARY_SIZE, fragment_length=64):
+    """Builds a dictionary from the markup fragments found in the most pages.
+    Most useful fragments go last, where zlib matches them cheapest."""
+    pages = Counter()
+    for body in bodies:
+        pages.update({fragment[:fragment_length] for fragment in body.split(b"<") if fragment})
+    scored = sorted(
+        (count * len(fragment), fragment) for fragment, count in pages.items() if count > 1
+    )
+    chosen = []
+    length = 0
+    for _, fragment in reversed(scored):
+        if length + len(fragment) + 1 > size:
+            break
+        chosen.append(b"<" + fragment)
+        length += len(fragment) + 1
+    return b"".join(reversed(chosen))
+
+
+class ArchiveError(Exception):
+    """What to throw if the file is not an archive."""
+
+
+class ArchiveWriter:
+    """Writes pages to path. Use as a context manager or call close()."""
+
+    def __init__(self, path, dictionary=None):
+        self.path = path
+        self.codec = Codec(dictionary)
+        self._flags = HAS_DICTIONARY if dictionary else 0
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, self._flags, 0, 0))
+        if dictionary:
+            self._file.write(DICTIONARY_LENGTH.pack(len(dictionary)))
+            self._file.write(dictionary)
+        self._index = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, key, status, body):
+        """body is the uncompressed response (bytes)."""
+        compressed = self.codec.compress(body)
+        self._index[key] = (self._file.tell(), len(compressed), status)
+        self._file.write(compressed)
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        for key in sorted(self._index):
+            encoded = key.encode("utf-8")
+            self._file.write(KEY_LENGTH.pack(len(encoded)))
+            self._file.write(encoded)
+            self._file.write(ENTRY.pack(*self._index[key]))
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self._flags, index_offset, len(self._index)))
+        self._file.close()
+
+
+class Archive:
+    """Memory-mapped reader for a file written by ArchiveWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, index_offset, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError("{} is not a version {} archive".format(path, VERSION))
+        dictionary = None
+        if flags & HAS_DICTIONARY:
+            (length,) = DICTIONARY_LENGTH.unpack_from(self._map, HEADER.size)
+            start = HEADER.size + DICTIONARY_LENGTH.size
+            dictionary = self._map[start:start + length]
+        self.codec = Codec(dictionary)
+        self._index = {}
+        position = index_offset
+        for _ in range(count):
+            (key_length,) = KEY_LENGTH.unpack_from(self._map, position)
+            position += KEY_LENGTH.size
+            key = self._map[position:position + key_length].decode("utf-8")
+            position += key_length
+            self._index[key] = ENTRY.unpack_from(self._map, position)
+            position += ENTRY.size
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def status(self, key):
+        return self._index[key][2]
+
+    def body(self, key):
+        """Uncompressed response body"""
+        offset, length, _ = self._index[key]
+        return self.codec.decompress(self._map[offset:offset + length])
+
+    def response(self, key):
+        return StoredResponse(self.status(key), self.body(key))
+
+    def close(self):
+        self._map.close()
+
+
+class ArchiveLoader(LocalLoader):
+    """Object for fetching pages from an archive (and liquipedia if missing)."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.archive = Archive(path)
+
+    def fetch_response(self, url, path):
+        if self.available(path):
+            return self.archive.response(tail(path))
+        return super().fetch_response(url, path)
+
+    def available(self, path):
+        return tail(path) in self.archive
+
+
+def cassette_pages(cassette_dir=CASSETTE_DIR):
+    """Yields (page, status, body) for every cassette under cassette_dir."""
+    for directory, _, filenames in os.walk(cassette_dir):
+        for filename in sorted(filenames):
+            yield from read_cassette(os.path.join(directory, filename))
+
+
+def convert_cassettes(archive_path, cassette_dir=CASSETTE_DIR, dictionary=True):
+    """Writes every cassette under cassette_dir to a new archive, compressed with
+    a dictionary trained on them unless dictionary is False. Returns page count."""
+    pages = list(cassette_pages(cassette_dir))
+    shared = train_dictionary(body for _, _, body in pages) if dictionary else None
+    with ArchiveWriter(archive_path, shared) as writer:
+        for page, status, body in pages:
+            writer.add(page, status, body)
+        return len(writer)
+
+
+def compression_report(cassette_dir=CASSETTE_DIR):
+    """Sizes (bytes) of the cassette corpus as recorded, as plain response
+    bodies and compressed without and with a shared dictionary."""
+    cassette_bytes = 0
+    for directory, _, filenames in os.walk(cassette_dir):
+        for filename in filenames:
+            cassette_bytes += os.path.getsize(os.path.join(directory, filename))
+    bodies = [body for _, _, body in cassette_pages(cassette_dir)]
+    dictionary = train_dictionary(bodies)
+    plain = Codec()
+    shared = Codec(dictionary)
+    return {
+        "pages": len(bodies),
+        "cassettes": cassette_bytes,
+        "bodies": sum(len(body) for body in bodies),
+        "compressed": sum(len(plain.compress(body)) for body in bodies),
+        "dictionary": len(dictionary),
+        "compressed_with_dictionary": len(dictionary) + sum(
+            len(shared.compress(body)) for body in bodies
+        ),
+    }
+
+
+class PageStore:
+    """Directory of compressed response bodies that loaders can add pages to.
+    The dictionary is fixed when the store is created."""
+    DICTIONARY = "dictionary"
+
+    def __init__(self, directory, dictionary=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        dictionary_path = os.path.join(directory, self.DICTIONARY)
+        if os.path.exists(dictionary_path):
+            with open(dictionary_path, "rb") as f:
+                dictionary = f.read()
+        elif dictionary:
+            with open(dictionary_path, "wb") as f:
+                f.write(dictionary)
+        self.codec = Codec(dictionary)
+
+    def filepath(self, path):
+        return "{}/{}.z".format(self.directory, tail(path))
+
+    def __contains__(self, path):
+        return os.path.exists(self.filepath(path))
+
+    def put(self, path, body):
+        """Saves a successful response body, replacing any earlier one."""
+        filepath = self.filepath(path)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        temporary = filepath + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(self.codec.compress(body))
+        os.replace(temporary, filepath)
+
+    def body(self, path):
+        with open(self.filepath(path), "rb") as f:
+            return self.codec.decompress(f.read())
+
+    def response(self, path):
+        return StoredResponse(200, self.body(path))
+
+    def fetched_at(self, path):
+        """Timestamp of when the page was stored, None if it is not."""
+        try:
+            return os.path.getmtime(self.filepath(path))
+        except OSError:
+            return None
+
+
+class StoreLoader(LocalLoader):
+    """Object for fetching pages from a PageStore, downloading (and storing)
+    the ones that are missing, or older than max_age seconds if given.
+    Offline, missing pages are 404s instead and stored pages never get old."""
+
+    def __init__(self, store, offline=False, max_age=None):
+        super().__init__()
+        self.store = store
+        self.offline = offline
+        self.max_age = max_age
+
+    def fetch_response(self, url, path):
+        if self.available(path):
+            return self.store.response(path)
+        if self.offline:
+            return StoredResponse(404, b"")
+        response = super().fetch_response(url, path)
+        if response.status_code == 200:
+            self.store.put(path, response.content)
+        return response
+
+    def available(self, path):
+        fetched_at = self.store.fetched_at(path)
+        if fetched_at is None:
+            return False
+        return self.offline or self.max_age is None or time.time() - fetched_at <= self.max_age
+
+    def fetched_at(self, path):
+        """When the stored copy of path was fetched, None if there is none."""
+        return self.store.fetched_at(path)
+
+    def throttle(self, path):
+        # Offline nothing goes over the network
+        return 0 if self.offline else super().throttle(path)
+
+    def actually_calling(self, path):
+        if not self.offline:
+            super().actually_calling(path)
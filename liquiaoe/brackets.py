@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+""" Graph of the matches in a tournament bracket."""
+from array import array
+
+NO_MATCH = -1
+
+
+class Bracket:
+    """Matches stored in parallel arrays in bracket (column) order.
+    Each match links to the matches its winner and loser play next, which
+    also covers double elimination as long as a player's matches appear in
+    the order they are played."""
+
+    def __init__(self, rounds=()):
+        self.matches = []
+        self.round = array("h")
+        self.winner_next = array("i")
+        self.loser_next = array("i")
+        self.parents = []
+        # player -> indexes of their matches, in order
+        self._paths = {}
+        # player -> round of the match that knocked them out
+        self._eliminated = {}
+        self.round_count = 0
+        for matches in rounds:
+            self.add_round(matches)
+
+    def __len__(self):
+        return len(self.matches)
+
+    def add_round(self, matches):
+        round_idx = self.round_count
+        self.round_count += 1
+        for match in matches:
+            idx = len(self.matches)
+            self.matches.append(match)
+            self.round.append(round_idx)
+            self.winner_next.append(NO_MATCH)
+            self.loser_next.append(NO_MATCH)
+            parents = []
+            for player in (match.winner, match.loser):
+                if not player:
+                    continue
+                path = self._paths.setdefault(player, array("i"))
+                if path:
+                    previous = path[-1]
+                    parents.append(previous)
+                    if self.matches[previous].winner == player:
+                        self.winner_next[previous] = idx
+                    else:
+                        self.loser_next[previous] = idx
+                path.append(idx)
+                self._eliminated.pop(player, None)
+            # A match still to be played (no winner yet) knocks nobody out;
+            # a forfeit has a winner and does
+            if match.winner and match.loser:
+                self._eliminated[match.loser] = round_idx
+            self.parents.append(tuple(parents))
+
+    def columns(self):
+        """Matches grouped by round."""
+        columns = [[] for _ in range(self.round_count)]
+        for match, round_idx in zip(self.matches, self.round):
+            columns[round_idx].append(match)
+        return columns
+
+    def path(self, player):
+        """Matches of player through the bracket."""
+        return [self.matches[idx] for idx in self._paths.get(player, ())]
+
+    def next_match(self, idx, player):
+        """Index of the match player plays after match idx (or NO_MATCH)."""
+        if self.matches[idx].winner == player:
+            return self.winner_next[idx]
+        return self.loser_next[idx]
+
+    def eliminated_in(self, player):
+        """Round player was knocked out in, None if still alive (or not in bracket)."""
+        return self._eliminated.get(player)
+
+    def alive(self):
+        """Players who have not lost their last match."""
+        return {player for player in self._paths if player not in self._eliminated}
+
+    def standings(self):
+        """(player, elimination round) with players still alive (None) first,
+        then by how late they were knocked out."""
+        alive = [(player, None) for player in sorted(self.alive())]
+        eliminated = sorted(self._eliminated.items(), key=lambda item: (-item[1], item[0]))
+        return alive + eliminated
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+""" Cache of parsed page results, so unchanged pages skip html parsing."""
+from hashlib import sha256
+import json
+import os
+import shutil
+
+from liquiaoe.managers import PARSER_VERSIONS
+
+
+class ParseCache:
+    """Plain (json) parse results in directory, keyed by parser kind and version,
+    a hash of the page html and any context the parse depends on.
+    Set as loader.parse_cache to use."""
+
+    def __init__(self, directory, versions=PARSER_VERSIONS):
+        self.directory = directory
+        self.versions = versions
+
+    def filepath(self, kind, html, context=""):
+        digest = sha256(html.encode("utf-8"))
+        digest.update(context.encode("utf-8"))
+        return "{}/{}/v{}/{}.json".format(self.directory, kind, self.versions[kind], digest.hexdigest())
+
+    def get(self, kind, html, context=""):
+        """Cached result, None if there is none."""
+        try:
+            with open(self.filepath(kind, html, context)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, kind, html, data, context=""):
+        filepath = self.filepath(kind, html, context)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        temporary = filepath + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, filepath)
+
+    def prune(self):
+        """Removes entries of parser versions no longer in use."""
+        removed = 0
+        for kind in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            current = "v{}".format(self.versions.get(kind))
+            kind_dir = os.path.join(self.directory, kind)
+            for version in os.listdir(kind_dir):
+                if version != current:
+                    shutil.rmtree(os.path.join(kind_dir, version))
+                    removed += 1
+        return removed
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+""" liqui-aoe command: refresh, rebuild and query the local store."""
+import argparse
+from datetime import date
+from multiprocessing import Pool
+import sys
+import time
+
+from liquiaoe.loaders import HttpsLoader, ReplayLoader, RequestsException, VcrLoader
+from liquiaoe.managers import (MatchResultsManager, ParserError, PlayerManager, Tournament,
+                               TournamentManager, TransferManager)
+from liquiaoe.refresh import PLAYER, PORTAL, TOURNAMENT, Refresh, player_urls
+from liquiaoe.store import Store
+
+DEFAULT_PORTAL = "/ageofempires/Portal:Tournaments"
+TIMEBOX_QUERIES = ("completed", "starting", "ending", "ongoing")
+LOADERS = {"https": HttpsLoader, "vcr": VcrLoader, "replay": ReplayLoader}
+
+
+def build_loader(args, offline=False):
+    """Loader picked by --loader, reading/keeping pages in --pages if given."""
+    if args.pages:
+        from liquiaoe.archive import PageStore, StoreLoader
+        loader = StoreLoader(PageStore(args.pages), offline=offline, max_age=args.max_age)
+    else:
+        loader = LOADERS[args.loader]()
+    if args.cache:
+        from liquiaoe.cache import ParseCache
+        loader.parse_cache = ParseCache(args.cache)
+    return loader
+
+def progress(message, started):
+    print("{:8.2f}s {}".format(time.perf_counter() - started, message), file=sys.stderr, flush=True)
+
+def portals(args):
+    """--portal pages, the main portal if neither portals nor tournaments are given."""
+    return args.portal or ([] if args.tournament else [DEFAULT_PORTAL])
+
+def refresh(args):
+    """Throttled fetch of portals, tournaments and players into the store."""
+    loader = build_loader(args)
+    if args.dry_run:
+        return plan(args, loader)
+    store = Store(args.store)
+    started = time.perf_counter()
+
+    def save(kind, path, result):
+        if kind == PORTAL:
+            store.save_tournaments(result.all(), page=path)
+        elif kind == TOURNAMENT:
+            store.save_tournament(result)
+        else:
+            store.save_player_results(path, result)
+        progress("{} {}".format(kind, path), started)
+
+    summary = Refresh(loader, args.journal, portals=portals(args),
+                      tournaments=args.tournament, players=args.players, handler=save).run()
+    if args.transfers:
+        transfers = TransferManager(loader).transfers
+        store.save_transfers(transfers)
+        progress("{} transfers".format(len(transfers)), started)
+    if args.matches:
+        match_results = MatchResultsManager(loader).match_results
+        store.save_match_results(match_results)
+        progress("{} match results".format(len(match_results)), started)
+    store.close()
+    print("fetched {fetched}, resumed {resumed}, skipped {}".format(len(summary["skipped"]), **summary))
+    return 0
+
+def plan(args, loader):
+    """Prints what refresh would fetch and how long it would take."""
+    from liquiaoe.plan import MATCH_RESULTS, TRANSFERS, plan as refresh_plan
+    seeds = [(PORTAL, url) for url in portals(args)] + [(TOURNAMENT, url) for url in args.tournament]
+    if args.transfers:
+        seeds.append((TRANSFERS, TransferManager.PORTAL))
+    if args.matches:
+        seeds.append((MATCH_RESULTS, MatchResultsManager.PORTAL))
+    planned = refresh_plan(loader, seeds, args.players, args.journal)
+    if args.budget is not None:
+        planned = planned.trim(args.budget)
+    for step in planned.steps:
+        print("\t".join((step.pages[0][1], step.kind, step.path)))
+    print("{calls} calls (at most {max_calls}), eta {eta}s (at most {max_eta}s), "
+          "{unexplored} pages not followed, {dropped} dropped".format(**planned.summary()))
+    return 0
+
+_worker_loader = None
+
+def _init_worker(pages, cache):
+    global _worker_loader
+    args = argparse.Namespace(pages=pages, cache=cache, loader=None, max_age=None)
+    _worker_loader = build_loader(args, offline=True)
+
+def _parse_tournament(data):
+    tournament = Tournament.from_dict(data)
+    try:
+        tournament.load_advanced(_worker_loader)
+    except (RequestsException, ParserError) as ex:
+        return tournament.url, None, str(ex)
+    return tournament.url, tournament.to_dict(), None
+
+def _parse_player(url):
+    try:
+        tournaments = PlayerManager(_worker_loader).tournaments(url)
+    except (RequestsException, ParserError) as ex:
+        return url, None, str(ex)
+    return url, [tournament.to_dict() for tournament in tournaments], None
+
+def rebuild(args):
+    """Re-parses the pages kept in --pages into the store, in a process pool."""
+    if not args.pages:
+        print("rebuild needs --pages", file=sys.stderr)
+        return 2
+    loader = build_loader(args, offline=True)
+    store = Store(args.store)
+    started = time.perf_counter()
+    tournaments = {url: {"url": url} for url in args.tournament}
+    for portal in portals(args):
+        try:
+            manager = TournamentManager(loader, portal)
+        except RequestsException as ex:
+            progress("skipped {} ({})".format(portal, ex.code), started)
+            continue
+        store.save_tournaments(manager.all(), page=portal)
+        tournaments.update((tournament.url, tournament.to_dict())
+                           for tournament in manager.all() if tournament.url)
+        progress("{} {}".format(PORTAL, portal), started)
+    players = set()
+    rebuilt = skipped = 0
+    with Pool(args.processes, _init_worker, (args.pages, args.cache)) as pool:
+        for url, data, error in pool.imap_unordered(_parse_tournament, tournaments.values()):
+            if data is None:
+                skipped += 1
+                progress("skipped {} {} ({})".format(TOURNAMENT, url, error or "missing"), started)
+                continue
+            tournament = Tournament.from_dict(data)
+            store.save_tournament(tournament)
+            players.update(player_urls(tournament))
+            rebuilt += 1
+            progress("{} {}".format(TOURNAMENT, url), started)
+        player_count = 0
+        if args.players:
+            for url, data, error in pool.imap_unordered(_parse_player, sorted(players)):
+                if data is None:
+                    skipped += 1
+                    progress("skipped {} {} ({})".format(PLAYER, url, error or "missing"), started)
+                    continue
+                store.save_player_results(url, [Tournament.from_dict(item) for item in data])
+                player_count += 1
+                progress("{} {}".format(PLAYER, url), started)
+    store.close()
+    print("rebuilt {} tournaments, {} players, skipped {}".format(rebuilt, player_count, skipped))
+    return 0
+
+def query(args):
+    """Timebox and player lookups against the store."""
+    if args.what in TIMEBOX_QUERIES and len(args.values) != 2:
+        print("query {} needs start and end dates".format(args.what), file=sys.stderr)
+        return 2
+    if args.what in ("player", "history") and not args.values:
+        print("query {} needs a player".format(args.what), file=sys.stderr)
+        return 2
+    store = Store(args.store)
+    if args.what in TIMEBOX_QUERIES:
+        timebox = (date.fromisoformat(args.values[0]), date.fromisoformat(args.values[1]))
+        for game, tournaments in sorted(getattr(store, args.what)(timebox).items()):
+            for tournament in tournaments:
+                print("\t".join((game, tournament.start.isoformat(), tournament.end.isoformat(),
+                                 tournament.tier, tournament.name, tournament.url)))
+    elif args.what == "player":
+        for tournament in store.player_results(args.values[0]):
+            print("\t".join((tournament.end.isoformat(), str(tournament.loader_place),
+                             tournament.tier, tournament.name, tournament.url)))
+    elif args.what == "history":
+        dates = [date.fromisoformat(value) for value in args.values[1:3]]
+        for result in store.player_history(args.values[0], *dates):
+            print("\t".join((result.date.isoformat() if result.date else "", result.winner,
+                             result.loser, result.score, result.tournament or "")))
+    else:
+        dates = [date.fromisoformat(value) for value in args.values[:2]]
+        for transfer in store.transfers(*dates):
+            print("\t".join((transfer.date.isoformat() if transfer.date else "",
+                             ", ".join(player[0] for player in transfer.players),
+                             transfer.old or "", transfer.new or "")))
+    store.close()
+    return 0
+
+def bench(args):
+    """Times loading and parsing with the chosen loader."""
+    loader = build_loader(args, offline=bool(args.pages))
+    started = time.perf_counter()
+    tournaments = [Tournament(url) for url in args.tournament]
+    for portal in portals(args):
+        tournaments.extend(TournamentManager(loader, portal).all()[:args.tournaments])
+        progress("{} {}".format(PORTAL, portal), started)
+    if args.workers:
+        from liquiaoe.pipeline import load_tournaments
+        failed = load_tournaments(loader, tournaments, args.workers)
+    else:
+        failed = {}
+        for tournament in tournaments:
+            try:
+                tournament.load_advanced(loader)
+            except (RequestsException, ParserError) as ex:
+                failed[tournament.url] = ex
+    for url, error in failed.items():
+        progress("skipped {} {} ({})".format(TOURNAMENT, url, error or "missing"), started)
+    progress("{} tournaments".format(len(tournaments) - len(failed)), started)
+    for player in args.player:
+        PlayerManager(loader).tournaments(player)
+        progress("{} {}".format(PLAYER, player), started)
+    print("total {:.3f}s".format(time.perf_counter() - started))
+    return 0
+
+def parser():
+    main_parser = argparse.ArgumentParser(prog="liqui-aoe", description=__doc__.strip())
+    main_parser.add_argument("--store", default="liquiaoe.db", help="sqlite store")
+    main_parser.add_argument("--loader", choices=sorted(LOADERS), default="https")
+    main_parser.add_argument("--pages", help="PageStore directory of fetched pages")
+    main_parser.add_argument("--cache", help="ParseCache directory")
+    main_parser.add_argument("--max-age", type=float,
+                             help="seconds after which a page in --pages is fetched again")
+    subparsers = main_parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help=refresh.__doc__)
+    refresh_parser.add_argument("--journal", default="refresh.journal")
+    rebuild_parser = subparsers.add_parser("rebuild", help=rebuild.__doc__)
+    rebuild_parser.add_argument("--processes", type=int, default=None)
+    for subparser in (refresh_parser, rebuild_parser):
+        subparser.add_argument("--portal", action="append", default=[])
+        subparser.add_argument("--tournament", action="append", default=[])
+        subparser.add_argument("--no-players", dest="players", action="store_false")
+    refresh_parser.add_argument("--transfers", action="store_true")
+    refresh_parser.add_argument("--matches", action="store_true")
+    refresh_parser.add_argument("--dry-run", action="store_true",
+                                help="only print the pages it would fetch and the eta")
+    refresh_parser.add_argument("--budget", type=float, help="seconds the dry run plan has to fit in")
+
+    query_parser = subparsers.add_parser("query", help=query.__doc__)
+    query_parser.add_argument("what", choices=TIMEBOX_QUERIES + ("player", "history", "transfers"))
+    query_parser.add_argument("values", nargs="*",
+                              help="start end dates, player url, or player key [start end]")
+
+    bench_parser = subparsers.add_parser("bench", help=bench.__doc__)
+    bench_parser.add_argument("--portal", action="append", default=[])
+    bench_parser.add_argument("--tournament", action="append", default=[])
+    bench_parser.add_argument("--tournaments", type=int, default=10,
+                              help="how many tournaments of each portal to load")
+    bench_parser.add_argument("--player", action="append", default=[])
+    bench_parser.add_argument("--workers", type=int, default=0,
+                              help="parse tournaments in this many pipeline workers")
+    return main_parser
+
+COMMANDS = {"refresh": refresh, "rebuild": rebuild, "query": query, "bench": bench}
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" One liquipedia key per player, whatever name a page shows them under."""
+import threading
+
+from liquiaoe.symbols import symbol
+
+
+class PlayerIndex:
+    """Keys, urls and display names of every player seen so far (in
+    tournament participants, team rosters and transfers), each to the
+    player's liquipedia key. Keys and urls always win over display names;
+    a display name seen for two different players resolves to nothing.
+    Parsers only add to it; names in parsed pages are resolved through it
+    when results are aggregated (MatchStats, TeamIndex), so what a page
+    parses to never depends on what was loaded before."""
+
+    def __init__(self):
+        # alias -> key, None once ambiguous
+        self._aliases = {}
+        self._urls = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of players."""
+        return len(self._urls)
+
+    def __contains__(self, alias):
+        return self._aliases.get(alias) is not None
+
+    def resolve(self, alias):
+        """Key of the player known as alias (key, url or display name), None if unknown."""
+        return self._aliases.get(alias)
+
+    def url(self, key):
+        """Url of the player page, None for a player without one."""
+        return self._urls.get(key)
+
+    def add(self, key, url=None, names=()):
+        if not key:
+            return
+        key = symbol(key)
+        with self._lock:
+            if url or key not in self._urls:
+                self._urls[key] = symbol(url)
+            self._aliases[key] = key
+            if url:
+                self._aliases[symbol(url)] = key
+            for name in names:
+                if not name or name == key:
+                    continue
+                known = self._aliases.get(name, key)
+                if name in self._urls:
+                    # Someone else's key
+                    continue
+                self._aliases[symbol(name)] = known if known == key else None
+
+    def add_lookup(self, participant_lookup):
+        """Adds a tournament's {display name: (key, url, ...)}."""
+        for name, player in participant_lookup.items():
+            self.add(player[0], player[1], (name,))
+
+    def add_players(self, players):
+        """Adds (display name, url) pairs, as in team rosters and transfers."""
+        for name, url in players:
+            if url:
+                self.add(url.split("/")[-1], url, (name,))
+
+    def clear(self):
+        with self._lock:
+            self._aliases.clear()
+            self._urls.clear()
+
+
+PLAYERS = PlayerIndex()
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """ Gets data from appropriate source."""
+import gzip
+import json
 import os
 import pathlib
 import time
-from bs4 import BeautifulSoup
-import requests
-import vcr
+from urllib.parse import urlsplit
+# bs4, requests, vcr and yaml are imported where they are used, so importing
+# the package (or a process that never parses or fetches) does not pay for them
 THROTTLE = 32
+# Statuses worth trying again
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Bytes read at a time when streaming a response
+CHUNK_SIZE = 64 * 1024
 CASSETTE_DIR = "{}/tests/vcr_cassettes".format(pathlib.Path(__file__).parent.parent.resolve())
 
 def tail(path):
@@ -19,13 +25,56 @@ def cassette(path):
         return cassette(path + "/index")
     return cassette_path
 
+def parse_html(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser")
+
+def read_cassette(filepath):
+    """Yields (page, status, body) for each interaction in a vcr cassette."""
+    import yaml
+    with open(filepath) as f:
+        data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    for interaction in data["interactions"]:
+        query = urlsplit(interaction["request"]["uri"]).query
+        # Keys stay percent-encoded, as in the paths passed to the loaders
+        page = dict(pair.split("=", 1) for pair in query.split("&"))["page"]
+        response = interaction["response"]
+        body = response["body"]["string"]
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if "gzip" in response["headers"].get("Content-Encoding", []):
+            body = gzip.decompress(body)
+        yield page, response["status"]["code"], body
+
 class HttpsLoader:
-    """ Object for downloading date from liquipedia."""
-    def __init__(self):
+    """ Object for downloading date from liquipedia.
+    timeout is (connect, read) seconds; failed calls are retried up to retries
+    times, waiting at least backoff * 2**attempt and never less than the throttle."""
+    def __init__(self, timeout=(10, 60), retries=3, backoff=THROTTLE):
         self.last_call = 0
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        # Optional cache of parsed results (see liquiaoe.cache)
+        self.parse_cache = None
+        # Parse tabular pages row by row as they arrive (see liquiaoe.stream)
+        self.streaming = False
         self._headers = {"User-Agent": "liqui-aoe/0.1 (feroc.felix@gmail.com)","Accept-Encoding": "gzip"}
         self._base_url = "https://liquipedia.net/ageofempires/api.php?redirects=true&action=parse&format=json&page={}"
 
+    @property
+    def session(self):
+        """Keep-alive session reused for every call."""
+        if self._session is None:
+            import requests
+            import requests.adapters
+            self._session = requests.Session()
+            self._session.headers.update(self._headers)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            self._session.mount("https://", adapter)
+        return self._session
+
     def throttle(self, _):
         return THROTTLE
 
@@ -36,18 +85,24 @@ class HttpsLoader:
         print("CALLING {}".format(path))
 
     def soup(self, path):
+        return parse_html(self.html(path))
+
+    def call(self, path):
+        """Api response for path, once the throttle allows."""
         # Per liquipedia api terms of use, parse requires 30 second throttle
         self.actually_calling(path)
         if self.last_call + self.throttle(path) > time.time():
             time.sleep(self.last_call + self.throttle(path) - time.time())
         self.update_last_call(path)
-        url = self._base_url.format(tail(path))
-        response = self.fetch_response(url, path)
+        return self.fetch_response(self._base_url.format(tail(path)), path)
+
+    def html(self, path):
+        """Page html, before parsing."""
+        response = self.call(path)
         if response.status_code == 200:
             info = response.json()
             try:
-                page_html = info['parse']['text']['*']
-                return BeautifulSoup(page_html, "html.parser")
+                return info['parse']['text']['*']
             except KeyError:
                 try:
                     if info["error"]["code"] == "missingtitle":
@@ -58,26 +113,56 @@ class HttpsLoader:
         else:
             raise RequestsException(response.text, response.status_code)
 
-    def fetch_response(self, url, _):
-        return requests.get(url, headers=self._headers)
+    def stream(self, path, chunk_size=CHUNK_SIZE):
+        """Page html in pieces, decoded as the response arrives, so the whole
+        page never has to be held (see liquiaoe.stream)."""
+        from liquiaoe.stream import page_text
+        response = self.call(path)
+        try:
+            if response.status_code != 200:
+                raise RequestsException(response.text, response.status_code)
+            yield from page_text(response.iter_content(chunk_size))
+        finally:
+            response.close()
+
+    def fetch_response(self, url, path):
+        import requests
+        attempt = 0
+        while True:
+            try:
+                # Streamed, so stream() can read the body as it arrives
+                response = self.session.get(url, timeout=self.timeout, stream=True)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                wait = retry_after(response)
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as ex:
+                if attempt >= self.retries:
+                    raise RequestsException(str(ex), 503)
+                wait = 0
+            wait = max(wait, self.backoff * 2 ** attempt, self.throttle(path))
+            attempt += 1
+            time.sleep(wait)
+            self.update_last_call(path)
 
     def update_last_call(self, _):
         self.last_call = time.time()
 
-class VcrLoader(HttpsLoader):
-    """Object for fetching test data from cassettes."""
+def retry_after(response):
+    """Seconds the server asked us to wait, 0 if it did not say."""
+    try:
+        return int(response.headers.get("Retry-After", 0))
+    except (AttributeError, ValueError):
+        return 0
+
+class LocalLoader(HttpsLoader):
+    """Base for loaders with some pages on disk; those skip the throttle.
+    Subclasses define available() and fetch_response()."""
 
     def update_last_call(self, path):
         if not self.available(path):
             self.last_call = time.time()
 
-    def fetch_response(self, url, path):
-        with vcr.use_cassette(cassette(path)):
-            return requests.get(url, headers=self._headers)
-
-    def available(self, path):
-        return os.path.exists(cassette(path))
-
     def actually_calling(self, path):
         if not self.available(path):
             print("CALLING {}".format(path))
@@ -88,6 +173,66 @@ class VcrLoader(HttpsLoader):
         else:
             return THROTTLE
 
+class VcrLoader(LocalLoader):
+    """Object for fetching test data from cassettes."""
+
+    def fetch_response(self, url, path):
+        import requests
+        import vcr
+        with vcr.use_cassette(cassette(path)):
+            return requests.get(url, headers=self._headers)
+
+    def available(self, path):
+        return os.path.exists(cassette(path))
+
+class ReplayLoader(VcrLoader):
+    """Object for reading test data straight from cassettes, without vcr or requests.
+    If sidecar_dir is set, extracted bodies are kept there as json for the next run."""
+
+    def __init__(self, sidecar_dir=None):
+        super().__init__()
+        self.sidecar_dir = sidecar_dir
+
+    def fetch_response(self, url, path):
+        if not self.available(path):
+            return super().fetch_response(url, path)
+        sidecar = self.sidecar(path)
+        if sidecar and os.path.exists(sidecar):
+            with open(sidecar, "rb") as f:
+                return StoredResponse(200, f.read())
+        for _, status, body in read_cassette(cassette(path)):
+            if sidecar and status == 200:
+                os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+                with open(sidecar, "wb") as f:
+                    f.write(body)
+            return StoredResponse(status, body)
+
+    def sidecar(self, path):
+        if self.sidecar_dir:
+            return "{}/{}.json".format(self.sidecar_dir, tail(path))
+        return None
+
+class StoredResponse:
+    """Stands in for a requests response when the page body comes from disk."""
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
 class RequestsException(Exception):
 
     def __init__(self, message, code=500):
@@ -1,24 +1,52 @@
 #!/usr/bin/env python3
 """ Everything you want to know about Age of Empires Tournaments."""
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from datetime import date, datetime, timedelta
+from functools import lru_cache
+import json
 import re
-
-import bs4
-import yaml
+import time
 
 PARTICIPANTS = re.compile(r"([0-9]+)")
 TEAM_PATTERN = re.compile(r"(2v2|3v3|4v4)")
 INTEGER = re.compile(r"^[0-9]+$")
-
-from liquiaoe.loaders import RequestsException
+# Bump when a parser changes so cached results of that kind are dropped
+PARSER_VERSIONS = {
+    "portal": 2,
+    "tournament": 4,
+    "player_results": 2,
+    "player_matches": 1,
+    "transfers": 1,
+    "match_results": 1,
+}
+
+from liquiaoe.brackets import Bracket
+from liquiaoe.identity import PLAYERS
+from liquiaoe.loaders import RequestsException, THROTTLE, parse_html
+from liquiaoe.prizes import Placements, parse_place, parse_prize
+from liquiaoe.stream import RowExtractor, stream_rows
+from liquiaoe.symbols import intern_attributes, intern_tuple, symbol
 
 
 class TournamentManager:
-    def __init__(self, loader, url="/ageofempires/Portal:Tournaments"):
+    def __init__(self, loader, url="/ageofempires/Portal:Tournaments", lazy=False, store=None):
+        """url is a portal page or a list of them (like the per game tournament archives),
+        merged into one tournament per url, earlier pages first.
+        lazy binds the tournaments to the loader so advanced attributes load on access.
+        With a store (liquiaoe.store.Store) a portal saved before is read from it instead
+        of the loader; refresh() reloads it from the loader."""
         self._tournaments = []
-        self.url = url
+        # tournament url -> tournament, for _tournaments
+        self._by_url = {}
+        # portal page -> its tournaments, in page order
+        self._pages = {}
+        self._extras = []
+        self.urls = [url] if isinstance(url, str) else list(url)
+        self.url = self.urls[0]
         self.loader = loader
+        self.lazy = lazy
+        self.store = store
         self.load()
 
     def completed(self, timebox):
@@ -53,48 +81,210 @@ class TournamentManager:
                 tournaments[tournament.game].append(tournament)
         return tournaments
 
+    @property
+    def _bound_loader(self):
+        return self.loader if self.lazy else None
+
     def all(self):
         """Returns information on all tournaments."""
         return self._tournaments
 
+    def tournament(self, url):
+        """The tournament with url, None if no page lists it."""
+        return self._by_url.get(url)
+
     def load(self):
         """Parses information in loader and adds to _tournaments."""
-        data = self.loader.soup(self.url)
+        for url in self.urls:
+            if self.store and self.store.has_page(url):
+                self._pages[url] = self.store.tournaments(url, self._bound_loader)
+            else:
+                self._pages[url] = self.load_page(url)
+        self.merge()
+
+    def refresh(self, urls=None):
+        """Parses portal pages (default all) again, replacing (and saving) their tournaments.
+        With a loader parse_cache only pages that changed are parsed."""
+        for url in urls or self.urls:
+            self._pages[url] = self.load_page(url)
+        self.merge()
+
+    def load_page(self, url):
+        tournaments = parse_page(
+            self.loader, url, "portal", self.parse_portal,
+            lambda data: Tournament.from_dict(data, self._bound_loader), parse_rows=self.stream_portal)
+        if self.store:
+            self.store.save_tournaments(tournaments, page=url)
+        return tournaments
 
-        start = node_from_class(data, "tournamentCard")
+    def merge(self):
+        """Rebuilds _tournaments from the pages and extras, one per url.
+        A tournament on several pages takes the values of the earliest page
+        that has them (see merge_tournament)."""
+        by_url = {}
+        for url in self.urls:
+            for tournament in self._pages[url]:
+                known = by_url.get(tournament.url)
+                if known is None:
+                    by_url[tournament.url] = tournament
+                else:
+                    merged = merge_tournament(tournament.to_dict(), known.to_dict())
+                    by_url[tournament.url] = Tournament.from_dict(merged, self._bound_loader)
+        for tournament in self._extras:
+            by_url.setdefault(tournament.url, tournament)
+        self._by_url = by_url
+        self._tournaments = list(by_url.values())
+
+    def parse_portal(self, data):
+        return self.tournaments_from_rows(portal_rows(data))
+
+    def stream_portal(self, chunks):
+        """parse_portal from html chunks (see liquiaoe.stream)."""
+        return self.tournaments_from_rows(stream_rows(chunks, RowExtractor("tournamentCard", "div", "gridRow")))
+
+    def tournaments_from_rows(self, rows):
+        """Tournaments of the (card, gridRow) rows of a portal."""
+        tournaments = []
         loaded = set()
-        while start:
-            if not class_in_node("tournamentCard", start):
-                start = start.next_sibling
+        done_card = None
+        for card, row in rows:
+            if card == done_card:
+                continue
+            tournament = Tournament(loader=self._bound_loader)
+            tournament.load_from_portal(row)
+            if tournament.url in loaded:
+                continue
+            if not tournament.start:
+                continue
+            loaded.add(tournament.url)
+            if not tournament.tier:
+                done_card = card
                 continue
+            tournaments.append(tournament)
+        return tournaments
 
-            rows = start.find_all("div")
-            for row in rows:
-                if class_in_node("gridRow", row):
-                    tournament = Tournament()
-                    tournament.load_from_portal(row)
-                    if tournament.url in loaded:
-                        continue
-                    if not tournament.start:
-                        continue
-                    loaded.add(tournament.url)
-                    if not tournament.tier:
-                        break
-                    self._tournaments.append(tournament)
-            start = start.next_sibling
     def load_extra(self, filepath):
-        """ load yaml from filepath and add extra tournaments to manager"""
+        """ load extra tournaments from filepath and add those not loaded yet (by url)
+        to manager. Either a yaml list or json lines (.jsonl), of curated entries
+        (url, name, start, end, game, tier, prize) or Tournament.to_dict() snapshots.
+        Entries are read one at a time."""
         with open(filepath) as f:
-            data = yaml.safe_load(f)
-        for tournament_data in data:
-            tournament = Tournament(tournament_data['url'], extra=True)
-            tournament.name = tournament_data['name']
-            tournament.start = tournament_data['start']
-            tournament.end = tournament_data['end']
-            tournament.game = tournament_data['game']
-            tournament.tier = tournament_data['tier']
-            tournament.prize = str(tournament_data['prize'])
-            self._tournaments.append(tournament)
+            entries = (json.loads(line) for line in f if line.strip()) \
+                if filepath.endswith(".jsonl") else yaml_items(f)
+            for tournament_data in entries:
+                if tournament_data['url'] in self._by_url:
+                    continue
+                tournament = self.extra_tournament(tournament_data)
+                self._extras.append(tournament)
+                self._by_url[tournament.url] = tournament
+                self._tournaments.append(tournament)
+
+    def extra_tournament(self, tournament_data):
+        if "prize_amount" in tournament_data:
+            tournament = Tournament.from_dict(tournament_data, self._bound_loader)
+            tournament.extra = True
+            return tournament
+        tournament = Tournament(tournament_data['url'], extra=True, loader=self._bound_loader)
+        tournament.name = tournament_data['name']
+        tournament.start = from_iso_date(tournament_data['start'])
+        tournament.end = from_iso_date(tournament_data['end'])
+        tournament.game = tournament_data['game']
+        tournament.tier = tournament_data['tier']
+        tournament.load_prize(str(tournament_data['prize']))
+        return tournament
+
+
+def yaml_items(lines):
+    """Items of a top level yaml list, loaded one at a time."""
+    import yaml
+    # libyaml when it is installed
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    chunk = []
+    for line in lines:
+        if chunk and (line.startswith("- ") or line.rstrip() == "-"):
+            yield from yaml.load("".join(chunk), Loader=loader) or ()
+            chunk = []
+        chunk.append(line)
+    if chunk:
+        yield from yaml.load("".join(chunk), Loader=loader) or ()
+
+
+def merge_tournament(old, new):
+    """new (from to_dict) over old, except where new does not know: text and
+    dates it has not got, and the page attributes an unloaded copy leaves out.
+    A portal copy keeps an earlier page load; a page copy keeps the portal's
+    name and game."""
+    merged = dict(old)
+    for name, value in new.items():
+        if value is None or value == "" or name == "participant_count" and value == -1:
+            continue
+        if name in ("prize_amount", "prize_currency") and not new.get("prize"):
+            continue
+        merged[name] = value
+    merged["loaded"] = bool(old.get("loaded") or new.get("loaded"))
+    return merged
+
+
+def parse_page(loader, path, kind, parse, load, context="", parse_rows=None):
+    """Returns parse(soup), a list of objects with to_dict(). If the loader has a
+    parse_cache and the page (and context) is unchanged, they are rebuilt with
+    load(dict) instead of parsing the html.
+    If the loader is streaming, parse_rows(html chunks) is used instead (when
+    given), without the parse_cache, which needs the whole page."""
+    if parse_rows and getattr(loader, "streaming", False):
+        return parse_rows(loader.stream(path))
+    html = loader.html(path)
+    cache = getattr(loader, "parse_cache", None)
+    if cache:
+        data = cache.get(kind, html, context)
+        if data is not None:
+            return [load(item) for item in data]
+    objects = parse(parse_html(html))
+    if cache:
+        cache.put(kind, html, [obj.to_dict() for obj in objects], context)
+    return objects
+
+
+def portal_rows(soup):
+    """(card number, gridRow) of the tournament cards of a portal soup."""
+    start = node_from_class(soup, "tournamentCard")
+    card = 0
+    while start:
+        if class_in_node("tournamentCard", start):
+            card += 1
+            for row in start.find_all("div"):
+                if class_in_node("gridRow", row):
+                    yield card, row
+        start = start.next_sibling
+
+
+def wikitable_rows(chunks):
+    """Rows of the first wikitable in html chunks, like
+    node_from_class(soup, "wikitable").find_all("tr")."""
+    extractor = RowExtractor("wikitable", "tr", first_only=True)
+    for _, row in stream_rows(chunks, extractor):
+        yield row
+    if not extractor.containers:
+        raise ParserError("wikitable missing")
+
+
+def iso_date(value):
+    return value.isoformat() if value else value
+
+
+def from_iso_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) and value else value
+
+
+def drop_third_place(rounds):
+    """The third place match shows up as an extra match in the final round."""
+    try:
+        if len(rounds[-1]) == len(rounds[-2]):
+            rounds[-1].pop()
+    except IndexError:
+        pass
+    return rounds
+
 
 def class_in_node(css_class, node):
     try:
@@ -120,16 +310,23 @@ def liquipedia_key(anchor_tag):
         _, attrs = href.split("?")
         for attr_pair in attrs.split("&"):
             if attr_pair.startswith("title="):
-                return attr_pair[6:]
+                return symbol(attr_pair[6:])
     else:
-        return href.split("/")[-1]
+        return symbol(href.split("/")[-1])
 
 
 def valid_href(anchor_tag):
     href = anchor_tag.attrs["href"]
-    return None if "redlink" in href else href
+    return None if "redlink" in href else symbol(href)
 
 
+def page_main(soup):
+    """Content node of a page soup."""
+    main = node_from_class(soup, "mw-parser-output")
+    if not main:
+        raise ParserError("No mw-parser-output in soup")
+    return main
+
 def node_from_class(ancestor, class_attribute):
     for node in ancestor.descendants:
         if class_in_node(class_attribute, node):
@@ -146,73 +343,182 @@ def div_attributes(div):
     return [string for string in div.stripped_strings]
 
 def next_tag(first_tag):
+    from bs4.element import Tag
     sibling = first_tag.next_sibling
     while sibling:
-        if isinstance(sibling, bs4.element.Tag):
+        if isinstance(sibling, Tag):
             return sibling
         sibling = sibling.next_sibling
     return None
 
 
+# Advanced attributes loaded from the tournament page (with their defaults)
+PAGE_ATTRIBUTES = {
+    "first_place": lambda: None,
+    "first_place_url": lambda: None,
+    "second_place": lambda: None,
+    "series": lambda: None,
+    "organizers": list,
+    "sponsors": list,
+    "game_mode": lambda: None,
+    "format_style": lambda: None,
+    "description": lambda: None,
+    "runners_up": list,
+    "teams": dict,
+    "placements": lambda: defaultdict(str),
+    "prize_table": Placements,
+    "links": list,
+}
+# Page attributes the portal sets as well
+PORTAL_RESULT = ("first_place", "first_place_url", "second_place")
+# Attributes that repeat across tournaments, kept as shared strings
+TOURNAMENT_SYMBOLS = ("url", "name", "game", "tier", "prize_currency", "loader_place",
+                      "loader_prize_currency") + PORTAL_RESULT
+# Attributes the tournament page can set
+PAGE_RESULT = ("prize", "prize_amount", "prize_currency", "start", "end", "team")
+# Advanced attributes that are expensive to build, in dependency order
+DETAIL_ATTRIBUTES = {
+    "participant_lookup": dict,
+    "matches": list,
+    "rounds": list,
+    "bracket": Bracket,
+}
+
+
 class Tournament:
-    def __init__(self, url="", extra=False):
+    def __init__(self, url="", extra=False, loader=None):
+        """If loader is passed, advanced attributes are loaded on first access
+        and participant_lookup, matches and rounds only built when read."""
         self.url = url
         self.extra = extra
         # Basic attributes (loaded from tournaments page)
         self.name = self.game = self.tier = self.prize = self.loader_prize = ""
-        self.start = (
-            self.end
-        ) = self.first_place = self.first_place_url = self.second_place = None
+        self.prize_amount = self.loader_prize_amount = 0.0
+        self.prize_currency = self.loader_prize_currency = ""
+        self.start = self.end = None
         self.loader_place = None
         self.participant_count = -1
         self.cancelled = False
-        self.series = None
+        self.team = False
         # Advanced (loaded from tournament page)
         self.loaded = False
-        self.participant_lookup = {}
-        self.organizers = []
-        self.sponsors = []
-        self.game_mode = None
-        self.format_style = None
-        self.description = None
-        self.team = False
-        self.runners_up = []
-        self.rounds = []
-        self.teams = {}
-        self.placements = defaultdict(str)
-        self.matches = []
-        self.links = []
+        self._loader = loader
+        # Html of the page until every detail is built, not its soup: it is
+        # parsed again when a detail is first read
+        self._html = None
+        if not loader:
+            self._set_defaults(PAGE_ATTRIBUTES)
+            self._set_defaults(DETAIL_ATTRIBUTES)
 
     def __str__(self):
         return self.name
 
+    def __getattr__(self, name):
+        """Only called for missing attributes, i.e. advanced ones of a bound tournament."""
+        loader = self.__dict__.get("_loader")
+        if not loader or name not in PAGE_ATTRIBUTES and name not in DETAIL_ATTRIBUTES:
+            raise AttributeError(name)
+        self.load_advanced(loader)
+        if name not in self.__dict__:
+            self.load_detail(name)
+            if all(detail in self.__dict__ for detail in DETAIL_ATTRIBUTES):
+                self._html = None
+        return self.__dict__[name]
+
+    @classmethod
+    def from_dict(cls, data, loader=None):
+        tournament = cls(data.get("url", ""), loader=loader)
+        tournament.load_dict(data)
+        return tournament
+
+    def to_dict(self, names=None):
+        """Plain (json-able) copy of the attributes loaded so far (or of names).
+        Until the page is loaded its attributes are only defaults and left out."""
+        data = {}
+        for name in names or list(self.__dict__):
+            if name.startswith("_") or name == "rounds" or name not in self.__dict__:
+                continue
+            if not self.loaded and (name in PAGE_ATTRIBUTES or name in DETAIL_ATTRIBUTES) \
+                    and name not in PORTAL_RESULT:
+                continue
+            value = self.__dict__[name]
+            if name in ("start", "end"):
+                value = iso_date(value)
+            elif name == "prize_table":
+                value = value.to_dict()
+            elif name == "matches":
+                value = [match.to_dict() for match in value]
+            elif name == "bracket":
+                value = [[match.to_dict() for match in column] for column in value.columns()]
+            data[name] = value
+        return data
+
+    def load_dict(self, data):
+        """Sets the attributes in data (from to_dict)."""
+        for name, value in data.items():
+            if name in ("start", "end"):
+                value = from_iso_date(value)
+            elif name == "placements":
+                value = defaultdict(str, {symbol(key): tuple(place) for key, place in value.items()})
+            elif name == "participant_lookup":
+                value = {symbol(key): intern_tuple(player) for key, player in value.items()}
+                PLAYERS.add_lookup(value)
+            elif name == "teams":
+                for team in value.values():
+                    team["members"] = [intern_tuple(member) for member in team["members"]]
+                    PLAYERS.add_players(team["members"])
+            elif name == "prize_table":
+                value = Placements.from_dict(value)
+            elif name == "matches":
+                value = [MatchResult.from_dict(match) for match in value]
+            elif name == "bracket":
+                columns = [[MatchResult.from_dict(match) for match in column] for column in value]
+                value = Bracket(columns)
+                self.rounds = drop_third_place([list(column) for column in columns])
+            setattr(self, name, value)
+        intern_attributes(self, TOURNAMENT_SYMBOLS)
+
+    def parse_context(self):
+        """What the page parse depends on besides the page."""
+        return "{}|{}|{}|{}".format(self.team, self.prize, self.start, self.end)
+
+    def _set_defaults(self, attributes):
+        for name, default in attributes.items():
+            if name not in self.__dict__:
+                setattr(self, name, default())
+
     @property
     def participants(self):
         return sorted(self.participant_lookup.values())
     def load_from_player(self, row, player_url):
         """Adds attributes from player_row."""
-        player_name = player_url.split('/')[-1]
-        tds = row.find_all("td")
-        self.end = datetime.strptime(tds[0].text, "%Y-%m-%d").date()
-        self.loader_place = tds[1].text
-        self.tier = tds[2].a.text
-        self.game = tds[3].a.attrs["title"]
-        self.name = tds[5].text
-        self.url = tds[5].a.attrs["href"]
-        self.team = tds[6].attrs['data-sort-value'] != player_name
-        prize = tds[9].text.strip()
-        if prize != '-':
+        self.load_player_result(player_result(row.find_all("td"), player_url.split('/')[-1]))
+
+    def load_player_result(self, values):
+        """Adds attributes from player_result values."""
+        self.end, self.loader_place, self.tier, self.game, self.name, self.url, self.team, prize = values
+        if prize is not None:
             self.loader_prize = prize
+            self.loader_prize_amount, self.loader_prize_currency = parse_prize(prize)
+        intern_attributes(self, TOURNAMENT_SYMBOLS)
 
     def load_advanced(self, loader):
         """Call the loader for self.url and parse."""
         if self.loaded:
             return
+        html = loader.html(self.url)
+        # Only once the page is there, so a failed fetch is tried again
         self.loaded = True
-        soup = loader.soup(self.url)
-        main = node_from_class(soup, "mw-parser-output")
-        if not main:
-            raise ParserError("No mw-parser-output in soup")
+        self._set_defaults(PAGE_ATTRIBUTES)
+        cache = getattr(loader, "parse_cache", None)
+        context = self.parse_context()
+        if cache:
+            data = cache.get("tournament", html, context)
+            if data is not None:
+                self.load_dict(data)
+                return
+        soup = parse_html(html)
+        main = page_main(soup)
         try:
             self.description = main.p.text.strip()
         except AttributeError:
@@ -230,13 +536,48 @@ class Tournament:
                 except ParserError:
                     continue
             self.load_participants(main, prize_table)
-            self.load_matches(main)
-            brackets = []
-            for div in main.find_all("div"):
-                if class_in_node("bracket", div):
-                    brackets.append(div)
-            if brackets:
-                self.load_bracket(brackets[-1])
+        except ParserError:
+            pass
+        if not self._loader or cache:
+            # Cached results have to be complete
+            for name in ("participant_lookup", "matches", "rounds"):
+                self.load_detail(name, main)
+        else:
+            self._html = html
+        if cache:
+            names = PAGE_RESULT + tuple(PAGE_ATTRIBUTES) + tuple(DETAIL_ATTRIBUTES)
+            cache.put("tournament", html, self.to_dict(names), context)
+
+    def load_detail(self, name, page=None):
+        """Builds participant_lookup, matches or rounds (with bracket) from page,
+        by default the loaded page parsed again."""
+        if name == "bracket":
+            name = "rounds"
+        if page is None and self._html is not None:
+            try:
+                page = page_main(parse_html(self._html))
+            except ParserError:
+                pass
+        if name != "participant_lookup" and "participant_lookup" not in self.__dict__:
+            # Matches resolve names through the lookup
+            self.load_detail("participant_lookup", page)
+        self.__dict__[name] = DETAIL_ATTRIBUTES[name]()
+        if name == "rounds":
+            self.bracket = Bracket()
+        if page is None:
+            return
+        try:
+            if name == "participant_lookup":
+                self.load_participant_lookup(page)
+            elif name == "matches":
+                self.load_matches(page)
+            else:
+                brackets = []
+                for div in page.find_all("div"):
+                    if class_in_node("bracket", div):
+                        brackets.append(div)
+                if brackets:
+                    self.load_bracket(brackets[-1])
         except ParserError:
             pass
 
@@ -258,11 +599,8 @@ class Tournament:
         for bracket_round in node.find_all("div"):
             if class_in_node("bracket-column-matches", bracket_round):
                 self.load_round(bracket_round)
-        try:
-            if len(self.rounds[-1]) == len(self.rounds[-2]):
-                self.rounds[-1].pop()
-        except IndexError:
-            pass
+        self.bracket = Bracket(self.rounds)
+        drop_third_place(self.rounds)
 
     def load_round(self, node):
         matches = []
@@ -271,15 +609,23 @@ class Tournament:
                 matches.append(MatchResult(match, self))
         self.rounds.append(matches)
 
-    def load_participants(self, node, prize_table):
+    def participant_node(self, node):
+        """The div following the Participants header, if any."""
         for h2 in node.find_all("h2", recursive=True):
             if "Participants" in h2.text:
                 break
         else:
-            return
+            return None
         participant_node = h2
         while participant_node.name != "div":
             participant_node = next_tag(participant_node)
+        return participant_node
+
+    def load_participants(self, node, prize_table):
+        """Loads teams and placements."""
+        participant_node = self.participant_node(node)
+        if not participant_node:
+            return
 
         if self.team:
             team_nodes = next_tag(participant_node)
@@ -287,11 +633,15 @@ class Tournament:
                 team_info = self.team_info(node)
                 if team_info:
                     self.teams[team_info["name"]] = team_info
+                    PLAYERS.add_players(team_info["members"])
 
         if not self.placements:
             self.load_all_places(prize_table)
+
+    def load_participant_lookup(self, node):
         if self.team:
             return
+        participant_node = self.participant_node(node)
         player_row = None
         while participant_node and not player_row:
             try:
@@ -309,8 +659,9 @@ class Tournament:
                     False,
                     "",
                 )
-                self.participant_lookup[span.a.text] = (name, href, *data)
+                self.participant_lookup[symbol(span.a.text)] = (name, href, *data)
             player_row = next_tag(player_row)
+        PLAYERS.add_lookup(self.participant_lookup)
 
     def team_name_from_node(self, team_name):
         try:
@@ -343,7 +694,7 @@ class Tournament:
                         last_a = td.find_all("a")[-1]
                         team_dict["members"].append(
                             (
-                                td.text.strip(),
+                                symbol(td.text.strip()),
                                 valid_href(last_a),
                             )
                         )
@@ -371,6 +722,8 @@ class Tournament:
             name_idx = participant_idx
             if len(divs) <= name_idx:
                 continue
+            place_range = parse_place(current_place)
+            prize = parse_prize(current_prize)
             for div in divs[participant_idx:]:
                 name_node  = div.find_all("span", {"class":"name"})
                 if not name_node:
@@ -381,10 +734,12 @@ class Tournament:
                 if self.team:
                     name = self.team_name_from_node(name)
                 link = name_node[0].a
-                self.placements[liquipedia_key(link)] = (
+                key = liquipedia_key(link)
+                self.placements[key] = (
                     current_place,
                     current_prize,
                 )
+                self.prize_table.add(key, place_range, prize)
                 if current_place == "1st":
                     self.first_place = name
                     self.first_place_url = valid_href(link)
@@ -415,7 +770,7 @@ class Tournament:
         for div in info_box.find_all("div"):
             try:
                 if not self.prize and div.text.strip() == "Prize Pool:":
-                    self.prize = text_from_tag(div, "div")
+                    self.load_prize(text_from_tag(div, "div"))
                 if div.text == "Series:":
                     self.series = text_from_tag(div, "div")
                 if div.text in (
@@ -467,12 +822,13 @@ class Tournament:
         self.load_game(divs[1])
         self.load_name_url(divs[2])
         self.load_dates(divs[3].text)
-        self.prize = divs[4].text.strip()
+        self.load_prize(divs[4].text.strip())
         self.load_participant_count(divs[6].text)
         self.first_place = self.first_place_url = self.second_place = None
         self.load_first_place_from_row(divs[7])
         if self.first_place and len(divs) == 9:
             self.load_second_place(divs[8])
+        intern_attributes(self, TOURNAMENT_SYMBOLS)
 
     def load_tier(self, row):
         """Load the first five attributes."""
@@ -502,6 +858,10 @@ class Tournament:
             except ValueError:
                 pass
 
+    def load_prize(self, text):
+        self.prize = text
+        self.prize_amount, self.prize_currency = parse_prize(text)
+
     def load_participant_count(self, text):
         match = PARTICIPANTS.match(text)
         if match:
@@ -536,62 +896,146 @@ class Tournament:
             pass
 
 
-class PlayerMatch:
-    def __init__(self, row):
+PLAYER_RESULT = ("end", "place", "tier", "game", "name", "url", "team", "prize")
+PLAYER_MATCH = ("end", "tier", "game", "tournament_name", "tournament_url", "played")
+PLAYER_MATCH_SYMBOLS = ("tier", "game", "tournament_name", "tournament_url")
+
+
+@lru_cache(maxsize=4096)
+def table_date(text):
+    """Date of a yyyy-mm-dd cell; a player has many rows on the same days."""
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def player_result(tds, player_name):
+    """PLAYER_RESULT values of the cells of a player results row.
+    prize is None if there is none."""
+    prize = tds[9].text.strip()
+    return (table_date(tds[0].text), tds[1].text, tds[2].a.text, tds[3].a.attrs["title"],
+            tds[5].text, tds[5].a.attrs["href"], tds[6].attrs['data-sort-value'] != player_name,
+            None if prize == '-' else prize)
+
+
+def player_match(tds):
+    """PLAYER_MATCH values of the cells of a player matches row."""
+    return (table_date(tds[0].text), tds[2].a.text if tds[2].a else 'Showmatch',
+            tds[3].span.a.attrs["title"], tds[5].text, tds[5].a.attrs["href"],
+            'W' not in (tds[6].text, tds[8].text))
+
+
+def table_columns(rows, width, values, names):
+    """{name: column} of values(cells) for the rows with width cells, each
+    row's cells found once. Columns are lists in row order."""
+    columns = tuple([] for _ in names)
+    for row in rows:
         tds = row.find_all("td")
-        self.end = datetime.strptime(tds[0].text, "%Y-%m-%d").date()
-        if tds[2].a:
-            self.tier = tds[2].a.text
-        else:
-            self.tier = 'Showmatch'
-        self.game = tds[3].span.a.attrs["title"]
-        self.tournament_name = tds[5].text
-        self.tournament_url = tds[5].a.attrs["href"]
-        self.played = 'W' not in (tds[6].text, tds[8].text)
-        
+        if len(tds) != width:
+            continue
+        for column, value in zip(columns, values(tds)):
+            column.append(value)
+    return dict(zip(names, columns))
+
+
+class PlayerMatch:
+    def __init__(self, row=None):
+        if row is None:
+            return
+        self.load_values(player_match(row.find_all("td")))
+
+    def load_values(self, values):
+        """Sets attributes from player_match values."""
+        self.end, self.tier, self.game, self.tournament_name, self.tournament_url, self.played = values
+        intern_attributes(self, PLAYER_MATCH_SYMBOLS)
+
+    @classmethod
+    def from_dict(cls, data):
+        match = cls()
+        match.__dict__.update(data)
+        match.end = from_iso_date(match.end)
+        intern_attributes(match, PLAYER_MATCH_SYMBOLS)
+        return match
+
+    def to_dict(self):
+        data = dict(self.__dict__)
+        data["end"] = iso_date(self.end)
+        return data
+
 class PlayerManager:
-    def __init__(self, loader):
+    def __init__(self, loader, store=None):
+        """With a store (liquiaoe.store.Store) player pages saved before are
+        read from it, and pages loaded are saved to it."""
         self.loader = loader
+        self.store = store
 
     def matches(self, player_url):
-        player_matches = []
         if "index" in player_url:
-            return player_matches
-        url = "{}/Matches".format(player_url)
-        try:
-            data = self.loader.soup(url)
-        except (RequestsException) as ex:
-            if ex.code == 404:
-                data = self.loader.soup(player_url)
-            else:
-                raise
+            return []
+        if self.store and self.store.has_player(player_url, "matches"):
+            return self.store.player_matches(player_url)
+        matches = self._player_page(player_url, "Matches", "player_matches",
+                                    self.parse_matches, PlayerMatch.from_dict,
+                                    lambda chunks: self.matches_from_rows(wikitable_rows(chunks)))
+        if self.store:
+            self.store.save_player_matches(player_url, matches)
+        return matches
+
+    def parse_matches(self, data):
         results_table = node_from_class(data, "wikitable")
-        for node in results_table.descendants:
-            if node.name == "tr" and len(node.find_all("td")) == 11:
-                player_matches.append(PlayerMatch(node))
-        
-        return player_matches
-        
+        return self.matches_from_rows(results_table.find_all("tr"))
+
+    def matches_from_rows(self, rows):
+        matches = []
+        for values in zip(*self.matches_columns(rows).values()):
+            match = PlayerMatch()
+            match.load_values(values)
+            matches.append(match)
+        return matches
+
+    def matches_columns(self, rows):
+        """PLAYER_MATCH columns of the rows of a matches table."""
+        return table_columns(rows, 11, player_match, PLAYER_MATCH)
 
     def tournaments(self, player_url):
-        player_tournaments = []
         if "index" in player_url:
-            return player_tournaments
-        url = "{}/Results".format(player_url)
+            return []
+        if self.store and self.store.has_player(player_url, "results"):
+            return self.store.player_results(player_url)
+        tournaments = self._player_page(
+            player_url, "Results", "player_results",
+            lambda data: self.parse_tournaments(data, player_url), Tournament.from_dict,
+            lambda chunks: self.tournaments_from_rows(wikitable_rows(chunks), player_url))
+        if self.store:
+            self.store.save_player_results(player_url, tournaments)
+        return tournaments
+
+    def parse_tournaments(self, data, player_url):
+        results_table = node_from_class(data, "wikitable")
+        return self.tournaments_from_rows(results_table.find_all("tr"), player_url)
+
+    def tournaments_from_rows(self, rows, player_url):
+        player_tournaments = []
+        for values in zip(*self.results_columns(rows, player_url).values()):
+            tournament = Tournament()
+            tournament.load_player_result(values)
+            player_tournaments.append(tournament)
+        return player_tournaments
+
+    def results_columns(self, rows, player_url):
+        """PLAYER_RESULT columns of the rows of a results table, for analysis
+        without a Tournament per row."""
+        player_name = player_url.split('/')[-1]
+        return table_columns(rows, 10, lambda tds: player_result(tds, player_name), PLAYER_RESULT)
+
+    def _player_page(self, player_url, page, kind, parse, load, parse_rows=None):
+        """Falls back to the player page if there is no subpage."""
+        url = "{}/{}".format(player_url, page)
         try:
-            data = self.loader.soup(url)
+            return parse_page(self.loader, url, kind, parse, load, player_url, parse_rows)
         except (RequestsException) as ex:
             if ex.code == 404:
-                data = self.loader.soup(player_url)
+                return parse_page(self.loader, player_url, kind, parse, load, player_url, parse_rows)
             else:
                 raise
-        results_table = node_from_class(data, "wikitable")
-        for node in results_table.descendants:
-            if node.name == "tr" and len(node.find_all("td")) == 10:
-                tournament = Tournament()
-                tournament.load_from_player(node, player_url)
-                player_tournaments.append(tournament)
-        return player_tournaments
 
 
 class TransferManager:
@@ -599,34 +1043,104 @@ class TransferManager:
 
     def __init__(self, loader):
         self.loader = loader
+        # Newest first, as on the portal
         self._transfers = []
+        self._keys = set()
+        # Sorted index (oldest first) for date range queries
+        self._dates = []
+        self._by_date = []
 
     @property
     def transfers(self):
         if not self._transfers:
-            data = self.loader.soup(self.PORTAL)
-            for node in data.find_all("div"):
-                if class_in_node("divRow", node):
-                    self._transfers.append(Transfer(node))
+            self.refresh()
         return self._transfers
 
+    def refresh(self):
+        """Reloads the portal and returns only transfers not seen before (newest first).
+        Rows older than the latest stored date are not parsed."""
+        latest = self._dates[-1] if self._dates else None
+        new_transfers = []
+        transfers = parse_page(self.loader, self.PORTAL, "transfers",
+                               lambda data: self.parse_transfers(data, latest),
+                               Transfer.from_dict, str(latest))
+        for transfer in transfers:
+            if transfer.key in self._keys:
+                continue
+            self._keys.add(transfer.key)
+            new_transfers.append(transfer)
+        for transfer in reversed(new_transfers):
+            if transfer.date is None:
+                continue
+            idx = bisect_right(self._dates, transfer.date)
+            self._dates.insert(idx, transfer.date)
+            self._by_date.insert(idx, transfer)
+        self._transfers = new_transfers + self._transfers
+        return new_transfers
+
+    def parse_transfers(self, data, latest):
+        transfers = []
+        for node in data.find_all("div", class_="divRow"):
+            if latest:
+                row_date = transfer_date(node)
+                if row_date and row_date < latest:
+                    # Newest first, so the rest is older too
+                    break
+            transfers.append(Transfer(node))
+        return transfers
+
+    def between(self, start, end):
+        """Transfers dated between the dates (inclusive), newest first.
+        Transfers without a date are left out."""
+        if not self._transfers:
+            self.refresh()
+        low = bisect_left(self._dates, start)
+        high = bisect_right(self._dates, end)
+        return self._by_date[low:high][::-1]
+
     def recent_transfers(self, now=None):
         """Transfers in the past week.
         'now' for testing."""
-        recent = []
         now = now or datetime.now().date()
         cutoff = now - timedelta(days=8)
-        for transfer in self.transfers:
-            if cutoff < transfer.date <= now:
-                recent.append(transfer)
-        return recent
+        return self.between(cutoff + timedelta(days=1), now)
+
+
+def transfer_date(row):
+    """Date of a transfer row without parsing the rest of it, None if it has none."""
+    cell = row.find("div", class_="Date", recursive=False)
+    try:
+        return date.fromisoformat(cell.text.strip())
+    except (AttributeError, ValueError):
+        return None
 
 
 class Transfer:
-    def __init__(self, row):
+    def __init__(self, row=None):
         self.date = self.old = self.new = self.ref = None
         self.players = []
-        self.load(row)
+        if row is not None:
+            self.load(row)
+
+    @classmethod
+    def from_dict(cls, data):
+        transfer = cls()
+        transfer.__dict__.update(data)
+        transfer.date = from_iso_date(transfer.date)
+        transfer.players = [intern_tuple(player) for player in transfer.players]
+        intern_attributes(transfer, ("old", "new"))
+        PLAYERS.add_players(transfer.players)
+        return transfer
+
+    def to_dict(self):
+        data = dict(self.__dict__)
+        data["date"] = iso_date(self.date)
+        return data
+
+    @property
+    def key(self):
+        """Identifies a transfer across refreshes."""
+        return (self.date, tuple(self.players), self.old, self.new)
 
     def load(self, row):
         for div in row.find_all("div"):
@@ -636,47 +1150,99 @@ class Transfer:
                 for a in div.find_all("a"):
                     if a.text:
                         player = (
-                            a.text,
+                            symbol(a.text),
                             valid_href(a),
                         )
                         self.players.append(player)
             if class_in_node("OldTeam", div):
                 for a in div.find_all("a"):
                     if "title" in a.attrs:
-                        self.old = a.attrs["title"]
+                        self.old = symbol(a.attrs["title"])
                         break
             if class_in_node("NewTeam", div):
                 for a in div.find_all("a"):
                     if "title" in a.attrs:
-                        self.new = a.attrs["title"]
+                        self.new = symbol(a.attrs["title"])
                         break
             if class_in_node("Ref", div):
                 try:
                     self.ref = div.a.attrs["href"]
                 except AttributeError:
                     pass
+        PLAYERS.add_players(self.players)
 
 
 class MatchResultsManager:
     PORTAL = "/ageofempires/Liquipedia:Upcoming_and_ongoing_matches"
+    NEW = "new"
+    CHANGED = "changed"
 
     def __init__(self, loader):
         self.loader = loader
         self._match_results = []
+        self._signatures = {}
 
     @property
     def match_results(self):
         if not self._match_results:
-            data = self.loader.soup(self.PORTAL)
-            for node in data.find_all("table"):
-                if class_in_node("infobox_matches_content", node):
-                    result = MatchResult(node)
-                    if result.played:
-                        self._match_results.append(MatchResult(node))
+            self.poll()
         return self._match_results
 
+    def poll(self):
+        """Reloads the portal and returns (event, result) for results that are
+        new or changed since the previous poll."""
+        match_results = parse_page(self.loader, self.PORTAL, "match_results",
+                                   self.parse_match_results, MatchResult.from_dict)
+        events = []
+        for result in match_results:
+            previous = self._signatures.get(result.key)
+            if previous is None:
+                events.append((self.NEW, result))
+            elif previous != result.signature:
+                events.append((self.CHANGED, result))
+            self._signatures[result.key] = result.signature
+        self._match_results = match_results
+        return events
+
+    def parse_match_results(self, data):
+        match_results = []
+        for node in data.find_all("table"):
+            if class_in_node("infobox_matches_content", node):
+                result = MatchResult(node)
+                if result.played:
+                    match_results.append(result)
+        return match_results
+
+    def watch(self, interval=THROTTLE, polls=None):
+        """Polls every interval seconds (never faster than the loader throttle)
+        and yields the events of each poll that has any."""
+        count = 0
+        while polls is None or count < polls:
+            if count:
+                time.sleep(max(interval, self.loader.throttle(self.PORTAL)))
+            count += 1
+            events = self.poll()
+            if events:
+                yield events
+
+
+MATCH_SYMBOLS = ("winner", "loser", "winner_url", "loser_url", "tournament", "game", "score")
+
 
 class MatchResult:
+    @classmethod
+    def from_dict(cls, data):
+        result = cls.__new__(cls)
+        result.__dict__.update(data)
+        result.date = from_iso_date(result.date)
+        intern_attributes(result, MATCH_SYMBOLS)
+        return result
+
+    def to_dict(self):
+        data = dict(self.__dict__)
+        data["date"] = iso_date(self.date)
+        return data
+
     def __init__(self, node, tournament=None):
         self.winner = None
         self.loser = None
@@ -695,6 +1261,7 @@ class MatchResult:
             self._build_from_bracket(node, tournament)
         if not self.winner:
             self.played = False
+        intern_attributes(self, MATCH_SYMBOLS)
 
     def _build_from_row(self, node, tournament):
         """ From round-robin/swiss brackets """
@@ -703,20 +1270,12 @@ class MatchResult:
         scores = []
         for td in node.find_all('td'):
             if class_in_node('matchlistslot', td):
+                name = td.text.strip()
+                key, url = player_key(tournament, name)
                 if class_in_node('bg-win', td):
-                    winner = td.text.strip()
-                    try:
-                        self.winner = tournament.participant_lookup[winner][0]
-                        self.winner_url = tournament.participant_lookup[winner][1]
-                    except KeyError:
-                        self.winner = winner
+                    self.winner, self.winner_url = key, url
                 else:
-                    loser = td.text.strip()
-                    try:
-                        self.loser = tournament.participant_lookup[loser][0]
-                        self.loser_url = tournament.participant_lookup[loser][1]
-                    except KeyError:
-                        self.loser = loser
+                    self.loser, self.loser_url = key, url
             else:
                 for div in td.find_all('div'):
                     if class_in_node("bracket-popup-body-time", div):
@@ -758,28 +1317,19 @@ class MatchResult:
                         break
                 if not key or key == 'TBD':
                     continue
-                try:
-                    if class_in_node('bracket-player-middle', div.div):
-                        continue
-                    if tournament.team:
-                        team = tournament.teams[key]
-                        name = team['url']
-                        url = "/ageofempires/{}".format(team['url'])
-                    else:
-                        player = tournament.participant_lookup[key]
-                        name = player[0]
-                        url = player[1]
-                    if "font-weight:bold" == div.attrs.get("style"):
-                        self.winner = name
-                        self.winner_url = url
-                    else:
-                        self.loser = name
-                        self.loser_url = url
-                except KeyError:
-                    if "font-weight:bold" == div.attrs.get("style"):
-                        winner = key
-                    else:
-                        loser = key
+                if class_in_node('bracket-player-middle', div.div):
+                    continue
+                if tournament.team:
+                    team = tournament.teams.get(key)
+                    player = team and (team['url'], "/ageofempires/{}".format(team['url']))
+                else:
+                    player = player_key(tournament, key)
+                if not player:
+                    continue
+                if "font-weight:bold" == div.attrs.get("style"):
+                    self.winner, self.winner_url = player
+                else:
+                    self.loser, self.loser_url = player
             if class_in_node("bracket-popup-body-time", div):
                 self._date_from_node(div)
 
@@ -802,6 +1352,8 @@ class MatchResult:
             style = td.attrs.get("style")
             css_class = td.attrs.get("class")
             anchors = td.find_all("a")
+            if class_in_node("versus", td):
+                self._score_from_node(td)
             if not anchors:
                 continue
             if idx == 0:
@@ -818,8 +1370,33 @@ class MatchResult:
         self.date = datetime.strptime(date_str, "%B %d, %Y").date()
         self.tournament = valid_href(match.div.div.a)
 
+    def _score_from_node(self, td):
+        scores = PARTICIPANTS.findall(td.text.split("(")[0])
+        if len(scores) == 2 and sum(int(x) for x in scores):
+            self.score = '{}-{}'.format(*sorted((int(x) for x in scores), reverse=True))
+
+    @property
+    def key(self):
+        """Identifies the match regardless of its outcome."""
+        return (self.tournament, self.date, frozenset((self.winner, self.loser)))
+
+    @property
+    def signature(self):
+        return (self.winner, self.loser, self.score, self.played)
+
     def __repr__(self):
         return "{} beat {} at {} at {}".format(self.winner, self.loser, self.tournament, self.date)
 
+def player_key(tournament, name):
+    """(key, url) of the player shown as name in tournament's participants,
+    else (name, None). Only the page itself is used, so parses do not depend
+    on what was loaded before: names are resolved across tournaments when
+    results are aggregated (see liquiaoe.identity)."""
+    player = tournament.participant_lookup.get(name)
+    if player:
+        return player[0], player[1]
+    return symbol(name), None
+
+
 class ParserError(Exception):
     """What to throw if something critical missing from soup."""
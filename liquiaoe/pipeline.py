@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+""" Fetch and parse stages, so pages are parsed while the next fetch waits."""
+import queue
+import threading
+
+from liquiaoe.loaders import RequestsException
+from liquiaoe.managers import PlayerManager
+
+DONE = object()
+
+
+class FetchedPages:
+    """Stands in for the loader in the parse stage: html() only knows the
+    pages the fetcher got for the job."""
+
+    def __init__(self, pages, parse_cache=None):
+        self.pages = pages
+        self.parse_cache = parse_cache
+
+    def html(self, path):
+        try:
+            return self.pages[path]
+        except KeyError:
+            raise RequestsException("{} not fetched".format(path), 404)
+
+
+class Pipeline:
+    """One fetcher thread owns the loader (and so its throttle) and hands
+    html through a bounded queue to parse worker threads. The workers are
+    threads: parsing overlaps the fetcher's throttle and network waits, it
+    does not run in parallel with other parsing."""
+
+    def __init__(self, loader, workers=2, queue_size=4):
+        self.loader = loader
+        self.workers = workers
+        self._jobs = queue.Queue()
+        self._pages = queue.Queue(queue_size)
+        self._results = queue.Queue()
+        self._pending = 0
+        self._cancelled = False
+        self._threads = [threading.Thread(target=self._fetch, daemon=True)]
+        self._threads.extend(threading.Thread(target=self._parse, daemon=True) for _ in range(workers))
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        # Failing consumer: nobody wants the rest
+        self.close(cancel=exc_type is not None)
+
+    def submit(self, paths, parse, tag=None):
+        """Fetches the first of paths there is (404s fall through to the next),
+        then calls parse(loader) in a worker with a loader that has that page.
+        results() yields (tag, result, error) for the job."""
+        self._pending += 1
+        self._jobs.put((tuple(paths), parse, tag))
+
+    def results(self):
+        """(tag, result, error) of submitted jobs as they finish, until none are left.
+        Jobs may be submitted while iterating."""
+        while self._pending:
+            item = self._results.get()
+            self._pending -= 1
+            yield item
+
+    def close(self, cancel=False):
+        """Waits for the submitted jobs, or with cancel only for the ones
+        already fetched."""
+        self._cancelled = cancel
+        self._jobs.put(DONE)
+        for thread in self._threads:
+            thread.join()
+
+    def _fetch(self):
+        parse_cache = getattr(self.loader, "parse_cache", None)
+        while True:
+            job = self._jobs.get()
+            if job is DONE:
+                for _ in range(self.workers):
+                    self._pages.put(DONE)
+                return
+            if self._cancelled:
+                continue
+            paths, parse, tag = job
+            fetched = {}
+            error = None
+            for path in paths:
+                try:
+                    fetched[path] = self.loader.html(path)
+                    break
+                except RequestsException as ex:
+                    error = ex
+                    if ex.code != 404:
+                        break
+                except Exception as ex:
+                    # Anything else would stop the stage with jobs left waiting
+                    error = ex
+                    break
+            if not fetched:
+                self._results.put((tag, None, error))
+                continue
+            self._pages.put((FetchedPages(fetched, parse_cache), parse, tag))
+
+    def _parse(self):
+        while True:
+            item = self._pages.get()
+            if item is DONE:
+                return
+            pages, parse, tag = item
+            try:
+                self._results.put((tag, parse(pages), None))
+            except Exception as ex:
+                self._results.put((tag, None, ex))
+
+
+def load_tournaments(loader, tournaments, workers=2):
+    """load_advanced for every tournament, pipelined.
+    Returns {url: error} of the ones that failed."""
+    failed = {}
+    with Pipeline(loader, workers) as pipeline:
+        for tournament in tournaments:
+            pipeline.submit((tournament.url,), tournament.load_advanced, tournament)
+        for tournament, _, error in pipeline.results():
+            if error:
+                failed[tournament.url] = error
+    return failed
+
+def player_tournaments(loader, player_urls, workers=2):
+    """PlayerManager.tournaments for every player, pipelined.
+    Returns ({player_url: tournaments}, {player_url: error})."""
+    results = {}
+    failed = {}
+    with Pipeline(loader, workers) as pipeline:
+        for player_url in player_urls:
+            pipeline.submit(("{}/Results".format(player_url), player_url),
+                            lambda page, url=player_url: PlayerManager(page).tournaments(url),
+                            player_url)
+        for player_url, tournaments, error in pipeline.results():
+            if error:
+                failed[player_url] = error
+            else:
+                results[player_url] = tournaments
+    return results, failed
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+""" Dry run of a refresh: which pages it would call for, and how long that takes."""
+from collections import Counter, deque
+
+from liquiaoe.loaders import LocalLoader, RequestsException
+from liquiaoe.managers import ParserError
+from liquiaoe.refresh import PLAYER, PORTAL, TOURNAMENT, Journal, load_page
+
+CACHED = "cached"
+STALE = "stale"
+MISSING = "missing"
+# Pages of these kinds are planned but not followed
+TRANSFERS = "transfers"
+MATCH_RESULTS = "match_results"
+# Lower goes first when trimming to a budget
+PRIORITY = {PORTAL: 0, TRANSFERS: 1, MATCH_RESULTS: 1, TOURNAMENT: 2, PLAYER: 3}
+
+
+class Step:
+    """One refresh page. pages are (page, status) in the order they are tried,
+    later ones only after a 404 (a player's results, then the player page)."""
+
+    def __init__(self, kind, path, pages, throttles):
+        self.kind = kind
+        self.path = path
+        self.pages = pages
+        # Throttle seconds of each page that is not cached
+        self.throttles = throttles
+        # Whether the pages it leads to are known (from a stored copy)
+        self.explored = False
+
+    @property
+    def calls(self):
+        """Calls if the first page is there."""
+        return 0 if self.pages[0][1] == CACHED else 1
+
+    @property
+    def max_calls(self):
+        """Calls if every page not cached is a 404, until one that is cached."""
+        return len(self.throttles)
+
+    @property
+    def seconds(self):
+        return self.throttles[0] if self.calls else 0
+
+    @property
+    def max_seconds(self):
+        return sum(self.throttles)
+
+
+class Plan:
+    """Steps of a refresh, in the order it takes them, with their cost.
+    Calls are throttled page fetches, seconds the throttle waits they take."""
+
+    def __init__(self, steps, dropped=()):
+        self.steps = steps
+        self.dropped = list(dropped)
+
+    @property
+    def calls(self):
+        return sum(step.calls for step in self.steps)
+
+    @property
+    def max_calls(self):
+        return sum(step.max_calls for step in self.steps)
+
+    @property
+    def eta(self):
+        """Seconds the refresh takes."""
+        return sum(step.seconds for step in self.steps)
+
+    @property
+    def max_eta(self):
+        """Seconds the refresh takes if every fallback is needed."""
+        return sum(step.max_seconds for step in self.steps)
+
+    def statuses(self):
+        """Pages by status, the first of each step."""
+        return Counter(step.pages[0][1] for step in self.steps)
+
+    def unexplored(self):
+        """Portals and tournaments to be fetched whose pages are not known yet,
+        so the plan leaves out what they lead to."""
+        return [step for step in self.steps if step.kind in (PORTAL, TOURNAMENT) and not step.explored]
+
+    def trim(self, budget, priority=None):
+        """Plan of the steps that fit in budget seconds (worst case), taken
+        by priority(step) (default by kind) and otherwise in plan order."""
+        priority = priority or (lambda step: PRIORITY.get(step.kind, len(PRIORITY)))
+        kept = set()
+        spent = 0
+        for step in sorted(self.steps, key=priority):
+            if spent + step.max_seconds <= budget:
+                kept.add(id(step))
+                spent += step.max_seconds
+        return Plan([step for step in self.steps if id(step) in kept],
+                    self.dropped + [step for step in self.steps if id(step) not in kept])
+
+    def summary(self):
+        statuses = self.statuses()
+        return {"steps": len(self.steps), "cached": statuses[CACHED], "stale": statuses[STALE],
+                "missing": statuses[MISSING], "calls": self.calls, "max_calls": self.max_calls,
+                "eta": self.eta, "max_eta": self.max_eta, "unexplored": len(self.unexplored()),
+                "dropped": len(self.dropped)}
+
+
+def page_status(loader, path):
+    """CACHED if the loader has path without a call, STALE if it has an old
+    copy it would fetch again, otherwise MISSING."""
+    if isinstance(loader, LocalLoader) and loader.available(path):
+        return CACHED
+    fetched_at = getattr(loader, "fetched_at", None)
+    if fetched_at and fetched_at(path) is not None:
+        return STALE
+    return MISSING
+
+def step_pages(kind, path):
+    if kind == PLAYER:
+        return ["{}/Results".format(path), path]
+    return [path]
+
+def stored_loader(loader):
+    """Loader reading what loader has stored, however old, never calling."""
+    from liquiaoe.archive import StoreLoader
+    if isinstance(loader, StoreLoader):
+        reader = StoreLoader(loader.store, offline=True)
+        reader.parse_cache = loader.parse_cache
+        return reader
+    return loader
+
+def plan(loader, seeds, players=True, journal_path=None):
+    """Plan of a Refresh with loader (and journal) from seeds, (kind, path)
+    pairs; TRANSFERS and MATCH_RESULTS seeds are the managers' portals.
+    Portals and tournaments that are stored are parsed (without calls) to
+    follow the pages they lead to, as the refresh would."""
+    journal = Journal(journal_path) if journal_path else None
+    reader = stored_loader(loader)
+    steps = []
+    queue = deque(seeds)
+    seen = set()
+    while queue:
+        kind, path = queue.popleft()
+        if path in seen:
+            continue
+        seen.add(path)
+        if journal and path in journal.done:
+            queue.extend(journal.done[path])
+            continue
+        pages = []
+        throttles = []
+        for page in step_pages(kind, path):
+            status = page_status(loader, page)
+            pages.append((page, status))
+            if status == CACHED:
+                break
+            throttles.append(loader.throttle(page))
+        step = Step(kind, path, pages, throttles)
+        steps.append(step)
+        if kind in (PORTAL, TOURNAMENT) and pages[0][1] != MISSING:
+            try:
+                queue.extend(load_page(reader, kind, path, players)[1])
+                step.explored = True
+            except (RequestsException, ParserError):
+                pass
+    return Plan(steps)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+""" Spends idle throttle slots on the tournament pages most likely to have changed."""
+from datetime import date, timedelta
+import threading
+import time
+
+from liquiaoe.loaders import CHUNK_SIZE, parse_html
+
+# Each tier down counts as one day less recent
+TIER_RANK = {"S-Tier": 0, "A-Tier": 1, "B-Tier": 2, "C-Tier": 3}
+OTHER_TIER = 4
+WINDOW = timedelta(days=3)
+# Prefetched pages older than this are fetched again when asked for
+MAX_AGE = 15 * 60
+
+
+def candidates(manager, match_results=(), today=None, window=WINDOW):
+    """Urls of the tournaments of manager (a TournamentManager) ending, ongoing or
+    starting within window of today, and of those with match results (from
+    MatchResultsManager) since, most likely to have changed first.
+    Likeliness is days since the last sign of activity (end, start or match
+    played; window for an ongoing tournament with none) plus the tier rank."""
+    today = today or date.today()
+    timebox = (today - window, today + window)
+    days = {}
+    for tournaments in manager.ending(timebox).values():
+        for tournament in tournaments:
+            days[tournament.url] = abs((today - tournament.end).days)
+    for tournaments in manager.ongoing(timebox).values():
+        for tournament in tournaments:
+            days[tournament.url] = window.days
+    for tournaments in manager.starting(timebox).values():
+        for tournament in tournaments:
+            days[tournament.url] = min(days.get(tournament.url, window.days),
+                                       abs((tournament.start - today).days))
+    for result in match_results:
+        if not result.tournament or not result.date or result.date < timebox[0]:
+            continue
+        url = tournament_url(manager, result.tournament)
+        days[url] = min(days.get(url, window.days), abs((today - result.date).days))
+
+    def score(url):
+        tournament = manager.tournament(url)
+        tier = TIER_RANK.get(tournament.tier, OTHER_TIER) if tournament else OTHER_TIER
+        return days[url] + tier, url
+    return sorted(days, key=score)
+
+def tournament_url(manager, url):
+    """The tournament of manager that url (say a group stage) is part of, url if none."""
+    parts = url.split("/")
+    for end in range(len(parts), 2, -1):
+        parent = "/".join(parts[:end])
+        if manager.tournament(parent):
+            return parent
+    return url
+
+
+class Prefetcher:
+    """Stands in for loader. Calls to html() go through as usual; meanwhile a
+    background thread fetches the queued pages, one whenever the loader's
+    throttle slot is free and nobody else is asking for it. A queued
+    prefetch never makes a foreground call wait: the background only starts
+    a fetch that needs no throttle wait, and gives its turn to any html()
+    call waiting. Prefetched pages are returned by html() without a call,
+    and passed to handler(path, html) if given."""
+
+    def __init__(self, loader, handler=None, max_age=MAX_AGE):
+        self.loader = loader
+        self.handler = handler
+        self.max_age = max_age
+        self.failed = {}
+        self._queue = []
+        self._pages = {}
+        self._foreground = 0
+        self._busy = False
+        self._stopped = False
+        self._changed = threading.Condition()
+        self._thread = None
+
+    def __getattr__(self, name):
+        # parse_cache, throttle, available... of the loader
+        return getattr(self.__dict__["loader"], name)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def queue(self, paths):
+        """Replaces the pages waiting to be prefetched, first first."""
+        with self._changed:
+            self._queue = list(paths)
+            self._changed.notify_all()
+
+    def start(self):
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Waits for a prefetch already on the wire, drops the rest."""
+        with self._changed:
+            self._stopped = True
+            self._changed.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def prefetched(self, path):
+        """Html of path if it was prefetched within max_age, else None."""
+        with self._changed:
+            return self._fresh(path)
+
+    def soup(self, path):
+        return parse_html(self.html(path))
+
+    def html(self, path):
+        with self._changed:
+            page = self._fresh(path)
+            if page is not None:
+                return page
+            self._take_turn(path)
+        try:
+            return self.loader.html(path)
+        finally:
+            self._end_turn()
+
+    def stream(self, path, chunk_size=CHUNK_SIZE):
+        """As the loader's stream(), holding the throttle slot until the
+        page is read, like html()."""
+        with self._changed:
+            page = self._fresh(path)
+            if page is None:
+                self._take_turn(path)
+        if page is not None:
+            yield page
+            return
+        try:
+            yield from self.loader.stream(path, chunk_size)
+        finally:
+            self._end_turn()
+
+    def _take_turn(self, path):
+        """Waits for the loader, ahead of the background thread."""
+        self._foreground += 1
+        while self._busy:
+            self._changed.wait()
+        self._busy = True
+        if path in self._queue:
+            self._queue.remove(path)
+
+    def _end_turn(self):
+        with self._changed:
+            self._foreground -= 1
+            self._busy = False
+            self._changed.notify_all()
+
+    def _fresh(self, path):
+        fetched, page = self._pages.get(path, (0, None))
+        return page if time.time() - fetched <= self.max_age else None
+
+    def _next(self):
+        """Waits for a free throttle slot nobody else wants; the path to
+        prefetch in it, None once stopped."""
+        with self._changed:
+            while not self._stopped:
+                if self._busy or self._foreground or not self._queue:
+                    self._changed.wait()
+                    continue
+                path = self._queue[0]
+                wait = self.loader.last_call + self.loader.throttle(path) - time.time()
+                if wait > 0:
+                    self._changed.wait(wait)
+                    continue
+                self._queue.pop(0)
+                self._busy = True
+                return path
+        return None
+
+    def _run(self):
+        while True:
+            path = self._next()
+            if path is None:
+                return
+            page = None
+            try:
+                page = self.loader.html(path)
+            except Exception as ex:
+                # Not only RequestsException: anything else would stop the thread
+                self.failed[path] = ex
+            finally:
+                with self._changed:
+                    if page is not None:
+                        self._pages[path] = (time.time(), page)
+                    self._busy = False
+                    self._changed.notify_all()
+            if page is not None and self.handler:
+                self.handler(path, page)
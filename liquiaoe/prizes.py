@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+""" Numeric prizes and placements."""
+from array import array
+from collections import defaultdict
+import re
+
+AMOUNT = re.compile(r"[0-9]+(?:[.,][0-9]+)*")
+SEPARATOR = re.compile(r"[.,]")
+CURRENCY_CODE = re.compile(r"\b([A-Z]{3})\b")
+# ISO 4217 codes, so "TBD" or "TOP" is not taken for a currency
+CURRENCY_CODES = frozenset((
+    "AED", "ARS", "AUD", "BGN", "BRL", "BYN", "CAD", "CHF", "CLP", "CNY", "COP", "CZK",
+    "DKK", "EGP", "EUR", "GBP", "HKD", "HRK", "HUF", "IDR", "ILS", "INR", "ISK", "JPY",
+    "KRW", "KZT", "MXN", "MYR", "NOK", "NZD", "PEN", "PHP", "PKR", "PLN", "RON", "RSD",
+    "RUB", "SAR", "SEK", "SGD", "THB", "TRY", "TWD", "UAH", "USD", "VND", "ZAR",
+))
+PLACE = re.compile(r"([0-9]+)")
+# Longest symbols first
+CURRENCY_SYMBOLS = (
+    ("US$", "USD"),
+    ("R$", "BRL"),
+    ("$", "USD"),
+    ("€", "EUR"),
+    ("£", "GBP"),
+    ("¥", "CNY"),
+    ("₹", "INR"),
+    ("₽", "RUB"),
+    ("₩", "KRW"),
+)
+
+
+def parse_prize(text):
+    """'$20,000\xa0USD' -> (20000.0, 'USD'). No prize is (0.0, '')"""
+    match = AMOUNT.search(text or "")
+    if not match:
+        return 0.0, ""
+    amount = parse_amount(match.group(0))
+    for code in CURRENCY_CODE.findall(text):
+        if code in CURRENCY_CODES:
+            return amount, code
+    for symbol, currency in CURRENCY_SYMBOLS:
+        if symbol in text:
+            return amount, currency
+    return amount, "USD"
+
+
+def parse_amount(text):
+    """'1.000.000' -> 1000000.0, '2,141.78' -> 2141.78, '12,50' -> 12.5
+    A separator followed by exactly three digits groups thousands,
+    any other is the decimal point."""
+    groups = SEPARATOR.split(text)
+    number = groups[0]
+    for digits in groups[1:]:
+        if len(digits) != 3:
+            number += "." + digits
+            break
+        number += digits
+    return float(number)
+
+
+def parse_place(text):
+    """'3rd\xa0-\xa04th' -> (3, 4), '1st' -> (1, 1). Unplaced is (0, 0)"""
+    places = PLACE.findall(text or "")
+    if not places:
+        return 0, 0
+    return int(places[0]), int(places[-1])
+
+
+class Placements:
+    """Placements of a tournament kept in parallel arrays."""
+
+    def __init__(self):
+        self.keys = []
+        self.low = array("H")
+        self.high = array("H")
+        self.amounts = array("d")
+        self.currencies = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_dict(cls, data):
+        placements = cls()
+        placements.keys = list(data["keys"])
+        placements.low.extend(data["low"])
+        placements.high.extend(data["high"])
+        placements.amounts.extend(data["amounts"])
+        placements.currencies = list(data["currencies"])
+        return placements
+
+    def to_dict(self):
+        return {
+            "keys": self.keys,
+            "low": self.low.tolist(),
+            "high": self.high.tolist(),
+            "amounts": self.amounts.tolist(),
+            "currencies": self.currencies,
+        }
+
+    def add(self, key, place, prize):
+        """Expects place and prize already parsed."""
+        self.keys.append(key)
+        self.low.append(place[0])
+        self.high.append(place[1])
+        self.amounts.append(prize[0])
+        self.currencies.append(prize[1])
+
+    def total(self, currency="USD"):
+        """Prize money paid out in currency."""
+        if all(code == currency for code in self.currencies):
+            return sum(self.amounts)
+        return sum(amount for amount, code in zip(self.amounts, self.currencies) if code == currency)
+
+
+def earnings(tournaments, currency="USD"):
+    """Prize money per player key from the placements of (loaded) tournaments."""
+    totals = defaultdict(float)
+    for tournament in tournaments:
+        table = tournament.prize_table
+        for key, amount, code in zip(table.keys, table.amounts, table.currencies):
+            if amount and code == currency:
+                totals[key] += amount
+    return totals
+
+
+def earnings_by_season(tournaments, currency="USD"):
+    """Prize money per year of the tournaments from a player's results."""
+    totals = defaultdict(float)
+    for tournament in tournaments:
+        if tournament.loader_prize_amount and tournament.loader_prize_currency == currency:
+            totals[tournament.end.year] += tournament.loader_prize_amount
+    return totals
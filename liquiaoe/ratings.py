@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+""" Head-to-head records and Elo ratings kept up to date as match results arrive."""
+from array import array
+from collections import Counter
+from datetime import date
+
+from liquiaoe.identity import PLAYERS
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+# Rating difference at which the stronger player is expected to win 10 to 1
+SCALE = 400.0
+
+
+def expected_score(rating, opponent):
+    """Chance of the player rated rating beating opponent."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / SCALE))
+
+
+def entry_date(entry):
+    return entry[0] or date.min
+
+
+class MatchStats:
+    """Sparse player by player win counts and Elo ratings of the played
+    results added (forfeits and unfinished matches are left out).
+    Results are deduplicated by MatchResult.key (tournament, date and
+    players), so the same match from a tournament page, a player page and
+    the matches portal counts once; names go through liquiaoe.identity.
+    Lookups cost a dict access. Ratings follow the order results arrive
+    in; rebuild() replays a whole history by date in one batch."""
+
+    def __init__(self, k_factor=K_FACTOR, initial=INITIAL_RATING):
+        self.k_factor = k_factor
+        self.initial = initial
+        # MatchResult.key -> (date, winner index, loser index)
+        self._results = {}
+        self._players = {}
+        self._names = []
+        self._wins = Counter()
+        self._ratings = array("d")
+        self._games = array("L")
+        # A changed result needs the ratings replayed
+        self._stale = False
+
+    def __len__(self):
+        """Number of results counted."""
+        return len(self._results)
+
+    def __contains__(self, player):
+        return self._index_of(player) is not None
+
+    def add(self, result):
+        """Counts result; False if it was already counted as is."""
+        entry = self._entry(result)
+        previous = self._results.get(result.key)
+        if previous == entry:
+            return False
+        if previous:
+            self._wins[previous[1:]] -= 1
+            self._stale = True
+        if not entry:
+            del self._results[result.key]
+            return True
+        self._results[result.key] = entry
+        self._wins[entry[1:]] += 1
+        if not self._stale:
+            self._rate(self._ratings, self._games, entry[1], entry[2])
+        return True
+
+    def add_all(self, results):
+        """Number of results new or changed."""
+        return sum(self.add(result) for result in results)
+
+    def apply(self, events):
+        """Adds the (event, result) pairs of MatchResultsManager.poll()"""
+        return self.add_all(result for _, result in events)
+
+    def rebuild(self, results):
+        """Starts over from results, in date order."""
+        self._results = {}
+        for result in results:
+            entry = self._entry(result)
+            if entry:
+                self._results[result.key] = entry
+            else:
+                self._results.pop(result.key, None)
+        self._wins = Counter(entry[1:] for entry in self._results.values())
+        self._replay()
+
+    def head_to_head(self, player, opponent):
+        """(wins of player over opponent, wins of opponent over player)"""
+        first = self._index_of(player)
+        second = self._index_of(opponent)
+        if first is None or second is None:
+            return 0, 0
+        return self._wins[(first, second)], self._wins[(second, first)]
+
+    def rating(self, player):
+        index = self._index_of(player)
+        if index is None:
+            return self.initial
+        if self._stale:
+            self._replay()
+        return self._ratings[index]
+
+    def games(self, player):
+        index = self._index_of(player)
+        if index is None:
+            return 0
+        if self._stale:
+            self._replay()
+        return self._games[index]
+
+    def ranking(self, min_games=1):
+        """[(player, rating)], best first."""
+        if self._stale:
+            self._replay()
+        ranked = [(name, rating) for name, rating, games
+                  in zip(self._names, self._ratings, self._games) if games >= min_games]
+        return sorted(ranked, key=lambda item: item[1], reverse=True)
+
+    def _entry(self, result):
+        if not result.played or not result.winner or not result.loser:
+            return None
+        return (result.date, self._index(result.winner), self._index(result.loser))
+
+    def _index(self, player):
+        player = PLAYERS.resolve(player) or player
+        index = self._players.get(player)
+        if index is None:
+            index = self._players[player] = len(self._names)
+            self._names.append(player)
+            self._ratings.append(self.initial)
+            self._games.append(0)
+        return index
+
+    def _index_of(self, player):
+        index = self._players.get(player)
+        if index is None:
+            index = self._players.get(PLAYERS.resolve(player))
+        return index
+
+    def _rate(self, ratings, games, winner, loser):
+        change = self.k_factor * (1.0 - expected_score(ratings[winner], ratings[loser]))
+        ratings[winner] += change
+        ratings[loser] -= change
+        games[winner] += 1
+        games[loser] += 1
+
+    def _replay(self):
+        ratings = array("d", [self.initial]) * len(self._names)
+        games = array("L", [0]) * len(self._names)
+        for _, winner, loser in sorted(self._results.values(), key=entry_date):
+            self._rate(ratings, games, winner, loser)
+        self._ratings = ratings
+        self._games = games
+        self._stale = False
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+""" Resumable refresh: portals -> tournament pages -> player pages."""
+from collections import deque
+import heapq
+import json
+import os
+import time
+
+from liquiaoe.loaders import THROTTLE, RequestsException
+from liquiaoe.managers import ParserError, PlayerManager, Tournament, TournamentManager
+
+PORTAL = "portal"
+TOURNAMENT = "tournament"
+PLAYER = "player"
+
+
+def player_urls(tournament):
+    """Urls of the players in a loaded tournament, teams included."""
+    urls = [player[1] for player in tournament.participant_lookup.values()]
+    for team in tournament.teams.values():
+        urls.extend(member[1] for member in team["members"])
+    return sorted(set(url for url in urls if url))
+
+
+class Journal:
+    """Append-only json lines record of the pages a refresh has finished,
+    with the pages each one led to, and of failed attempts."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.failed = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash
+                        continue
+                    if entry["status"] == "done":
+                        self.done[entry["path"]] = [tuple(item) for item in entry["next"]]
+                        self.failed.pop(entry["path"], None)
+                    else:
+                        self.failed[entry["path"]] = entry["error"]
+
+    def _write(self, entry):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_done(self, kind, path, next_items):
+        self.done[path] = list(next_items)
+        self.failed.pop(path, None)
+        self._write({"status": "done", "kind": kind, "path": path, "next": self.done[path]})
+
+    def record_failure(self, kind, path, attempts, error):
+        self.failed[path] = error
+        self._write({"status": "failed", "kind": kind, "path": path,
+                     "attempts": attempts, "error": error})
+
+
+class Refresh:
+    """Walks portals, their tournaments and (if players) the participants' result
+    pages. Finished pages are journaled, so a rerun with the same journal only
+    works on what is left. Failed pages are retried after backoff * 2**attempt
+    seconds without holding up the rest; 404s are not retried.
+    handler(kind, path, result) is called with each parsed page.
+    Retrying is left to the refresh: the loader's own retries are set to 0
+    while it runs, or every failed page would be fetched
+    (retries + 1) * (loader retries + 1) times."""
+
+    def __init__(self, loader, journal_path, portals=(), tournaments=(), players=True,
+                 retries=3, backoff=THROTTLE, handler=None):
+        self.loader = loader
+        self.journal = Journal(journal_path)
+        self.seeds = [(PORTAL, url) for url in portals] + [(TOURNAMENT, url) for url in tournaments]
+        self.players = players
+        self.retries = retries
+        self.backoff = backoff
+        self.handler = handler
+
+    def run(self):
+        """Returns summary of fetched, resumed (from journal) and skipped pages."""
+        retries = getattr(self.loader, "retries", 0)
+        self.loader.retries = 0
+        try:
+            return self._run()
+        finally:
+            self.loader.retries = retries
+
+    def _run(self):
+        summary = {"fetched": 0, "resumed": 0, "skipped": {}}
+        queue = deque(self.seeds)
+        retry_queue = []
+        attempts = {}
+        seen = set()
+        while queue or retry_queue:
+            while retry_queue and (not queue or retry_queue[0][0] <= time.time()):
+                due, kind, path = heapq.heappop(retry_queue)
+                time.sleep(max(0, due - time.time()))
+                seen.discard(path)
+                queue.append((kind, path))
+            kind, path = queue.popleft()
+            if path in seen:
+                continue
+            seen.add(path)
+            if path in self.journal.done:
+                summary["resumed"] += 1
+                queue.extend(self.journal.done[path])
+                continue
+            try:
+                next_items = self.process(kind, path)
+            except (RequestsException, ParserError) as ex:
+                attempts[path] = attempts.get(path, 0) + 1
+                self.journal.record_failure(kind, path, attempts[path], str(ex))
+                if attempts[path] > self.retries or getattr(ex, "code", None) == 404:
+                    summary["skipped"][path] = str(ex)
+                else:
+                    due = time.time() + self.backoff * 2 ** (attempts[path] - 1)
+                    heapq.heappush(retry_queue, (due, kind, path))
+                continue
+            attempts.pop(path, None)
+            summary["fetched"] += 1
+            self.journal.record_done(kind, path, next_items)
+            queue.extend(next_items)
+        return summary
+
+    def process(self, kind, path):
+        """Loads one page and returns the (kind, path) pages it leads to."""
+        result, next_items = load_page(self.loader, kind, path, self.players)
+        if self.handler:
+            self.handler(kind, path, result)
+        return next_items
+
+
+def load_page(loader, kind, path, players=True):
+    """(result, the (kind, path) pages it leads to) of one refresh page."""
+    if kind == PORTAL:
+        result = TournamentManager(loader, path)
+        next_items = [(TOURNAMENT, tournament.url) for tournament in result.all()
+                      if tournament.url]
+    elif kind == TOURNAMENT:
+        result = Tournament(path)
+        result.load_advanced(loader)
+        next_items = []
+        if players:
+            next_items = [(PLAYER, url) for url in player_urls(result)]
+    else:
+        result = PlayerManager(loader).tournaments(path)
+        next_items = []
+    return result, next_items
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+""" SQLite copy of what the managers load, so processes can share it."""
+from collections import defaultdict
+import json
+import sqlite3
+import time
+
+from liquiaoe.managers import (MatchResult, PlayerMatch, Tournament, Transfer, iso_date,
+                               merge_tournament)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page TEXT PRIMARY KEY,
+    loaded REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tournaments (
+    url TEXT PRIMARY KEY,
+    name TEXT,
+    game TEXT,
+    tier TEXT,
+    start TEXT,
+    end TEXT,
+    prize_amount REAL,
+    prize_currency TEXT,
+    first_place TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tournaments_start ON tournaments (start);
+CREATE INDEX IF NOT EXISTS tournaments_end ON tournaments (end);
+CREATE TABLE IF NOT EXISTS page_tournaments (
+    page TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (page, position)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    tournament TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    loser TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tournament, winner, loser, date)
+);
+CREATE INDEX IF NOT EXISTS matches_winner ON matches (winner);
+CREATE INDEX IF NOT EXISTS matches_loser ON matches (loser);
+CREATE TABLE IF NOT EXISTS player_pages (
+    player_url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    end TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (player_url, kind, position)
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    date TEXT NOT NULL,
+    players TEXT NOT NULL,
+    old TEXT NOT NULL,
+    new TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, players, old, new)
+);
+"""
+
+PLAYER_RESULTS = "results"
+PLAYER_MATCHES = "matches"
+
+
+class Store:
+    """Tournaments, matches, player pages and transfers in an indexed SQLite
+    file. Saving the same thing again updates it in place."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def has_page(self, page):
+        """Whether a portal has been saved."""
+        row = self.connection.execute("SELECT 1 FROM pages WHERE page = ?", (page,)).fetchone()
+        return row is not None
+
+    def page_loaded(self, page):
+        """When page was last saved, None if never."""
+        row = self.connection.execute("SELECT loaded FROM pages WHERE page = ?", (page,)).fetchone()
+        return row[0] if row else None
+
+    def save_tournaments(self, tournaments, page=None):
+        """Upserts tournaments (and their matches). With page, they are also
+        remembered, in order, as that portal's tournaments."""
+        with self.connection:
+            for tournament in tournaments:
+                self._save_tournament(tournament)
+            if page:
+                self.connection.execute("DELETE FROM page_tournaments WHERE page = ?", (page,))
+                self.connection.executemany(
+                    "INSERT INTO page_tournaments VALUES (?, ?, ?)",
+                    [(page, idx, tournament.url) for idx, tournament in enumerate(tournaments)])
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?)", (page, time.time()))
+
+    def save_tournament(self, tournament):
+        with self.connection:
+            self._save_tournament(tournament)
+
+    def _save_tournament(self, tournament):
+        data = tournament.to_dict()
+        row = self.connection.execute(
+            "SELECT data FROM tournaments WHERE url = ?", (tournament.url,)).fetchone()
+        if row:
+            data = merge_tournament(json.loads(row[0]), data)
+            tournament = Tournament.from_dict(data)
+        self.connection.execute(
+            """INSERT INTO tournaments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET name = excluded.name, game = excluded.game,
+            tier = excluded.tier, start = excluded.start, end = excluded.end,
+            prize_amount = excluded.prize_amount, prize_currency = excluded.prize_currency,
+            first_place = excluded.first_place, data = excluded.data""",
+            (tournament.url, tournament.name, tournament.game, tournament.tier,
+             iso_date(tournament.start), iso_date(tournament.end), tournament.prize_amount,
+             tournament.prize_currency, tournament.__dict__.get("first_place"),
+             json.dumps(data)))
+        self._save_matches(tournament.__dict__.get("matches", ()))
+
+    def save_match_results(self, match_results):
+        with self.connection:
+            self._save_matches(match_results)
+
+    def _save_matches(self, match_results):
+        self.connection.executemany(
+            """INSERT INTO matches VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (tournament, winner, loser, date) DO UPDATE SET data = excluded.data""",
+            [(result.tournament or "", result.winner, result.loser, iso_date(result.date) or "",
+              json.dumps(result.to_dict()))
+             for result in match_results if result.winner and result.loser])
+
+    def save_player_results(self, player_url, tournaments):
+        self._save_player_page(player_url, PLAYER_RESULTS, tournaments)
+
+    def save_player_matches(self, player_url, matches):
+        self._save_player_page(player_url, PLAYER_MATCHES, matches)
+
+    def _save_player_page(self, player_url, kind, items):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM player_pages WHERE player_url = ? AND kind = ?", (player_url, kind))
+            self.connection.executemany(
+                "INSERT INTO player_pages VALUES (?, ?, ?, ?, ?)",
+                [(player_url, kind, idx, iso_date(item.end), json.dumps(item.to_dict()))
+                 for idx, item in enumerate(items)])
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?)",
+                ("{}#{}".format(player_url, kind), time.time()))
+
+    def save_transfers(self, transfers):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?)",
+                [(iso_date(transfer.date) or "", json.dumps(transfer.players), transfer.old or "",
+                  transfer.new or "", json.dumps(transfer.to_dict())) for transfer in transfers])
+
+    def tournaments(self, page=None, loader=None):
+        """All tournaments, or those of a portal in portal order."""
+        if page:
+            rows = self.connection.execute(
+                """SELECT data FROM page_tournaments JOIN tournaments USING (url)
+                WHERE page = ? ORDER BY position""", (page,))
+        else:
+            rows = self.connection.execute("SELECT data FROM tournaments ORDER BY end, url")
+        return [Tournament.from_dict(json.loads(data), loader) for (data,) in rows]
+
+    def tournament(self, url, loader=None):
+        row = self.connection.execute("SELECT data FROM tournaments WHERE url = ?", (url,)).fetchone()
+        return Tournament.from_dict(json.loads(row[0]), loader) if row else None
+
+    def _by_game(self, where, args):
+        tournaments = defaultdict(list)
+        query = "SELECT data FROM tournaments WHERE {} ORDER BY end, url".format(where)
+        for (data,) in self.connection.execute(query, [iso_date(arg) for arg in args]):
+            tournament = Tournament.from_dict(json.loads(data))
+            tournaments[tournament.game].append(tournament)
+        return tournaments
+
+    def completed(self, timebox):
+        """Same as TournamentManager.completed, for every saved tournament."""
+        return self._by_game("? <= end AND end <= ?", timebox)
+
+    def ending(self, timebox):
+        return self._by_game("start < ? AND ? <= end AND end <= ?", (timebox[0], timebox[0], timebox[1]))
+
+    def ongoing(self, timebox):
+        return self._by_game("start < ? AND end > ?", timebox)
+
+    def starting(self, timebox):
+        return self._by_game("? <= start AND start <= ?", timebox)
+
+    def has_player(self, player_url, kind):
+        return self.page_loaded("{}#{}".format(player_url, kind)) is not None
+
+    def player_results(self, player_url):
+        """Tournaments from the player's results page, as saved."""
+        return [Tournament.from_dict(data) for data in self._player_page(player_url, PLAYER_RESULTS)]
+
+    def player_matches(self, player_url):
+        return [PlayerMatch.from_dict(data) for data in self._player_page(player_url, PLAYER_MATCHES)]
+
+    def _player_page(self, player_url, kind):
+        rows = self.connection.execute(
+            "SELECT data FROM player_pages WHERE player_url = ? AND kind = ? ORDER BY position",
+            (player_url, kind))
+        return [json.loads(data) for (data,) in rows]
+
+    def player_history(self, player, start=None, end=None):
+        """Match results won or lost by player (key), oldest first."""
+        rows = self.connection.execute(
+            """SELECT data FROM matches WHERE (winner = ? OR loser = ?) AND date BETWEEN ? AND ?
+            ORDER BY date, tournament""",
+            (player, player, iso_date(start) or "", iso_date(end) or "9999"))
+        return [MatchResult.from_dict(json.loads(data)) for (data,) in rows]
+
+    def transfers(self, start=None, end=None):
+        """Transfers between the dates (inclusive), newest first.
+        Transfers without a date come last, and only when no start is given."""
+        rows = self.connection.execute(
+            "SELECT data FROM transfers WHERE date BETWEEN ? AND ? ORDER BY date DESC",
+            (iso_date(start) or "", iso_date(end) or "9999"))
+        return [Transfer.from_dict(json.loads(data)) for (data,) in rows]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+""" Row by row parsing of page html as it arrives, for pages too big to hold as one soup."""
+import codecs
+from collections import Counter
+from html.parser import HTMLParser
+import json
+import re
+
+from liquiaoe.loaders import RequestsException, parse_html
+
+# Where the page html starts in an api parse response
+TEXT_MARKER = '"*":"'
+# Enough of a response without html to tell what went wrong
+HEAD_LENGTH = 4096
+UNESCAPED = re.compile(r'[^"\\]*')
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def page_text(chunks):
+    """Yields the page html of an api parse response, given in byte chunks,
+    decoded piece by piece. Raises RequestsException if there is none
+    (404 for a missing page), like HttpsLoader.html."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    head = ""
+    buffer = ""
+    found = False
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if not found:
+            index = buffer.find(TEXT_MARKER)
+            if index < 0:
+                head = (head + buffer[:-len(TEXT_MARKER)])[:HEAD_LENGTH]
+                buffer = buffer[-len(TEXT_MARKER):]
+                continue
+            found = True
+            buffer = buffer[index + len(TEXT_MARKER):]
+        text, buffer, done = unescape(buffer)
+        if text:
+            yield text
+        if done:
+            return
+    if found:
+        raise RequestsException("page html cut off", 500)
+    head += buffer
+    raise RequestsException(head, 404 if '"missingtitle"' in head else 200)
+
+def unescape(text):
+    """(decoded string contents, what is left undecoded, whether the string ended)
+    of text, json string contents up to the closing quote. Escapes cut off at
+    the end of text are left for the next piece."""
+    pieces = []
+    position = 0
+    while True:
+        match = UNESCAPED.match(text, position)
+        pieces.append(match.group())
+        position = match.end()
+        if position == len(text):
+            return "".join(pieces), "", False
+        if text[position] == '"':
+            return "".join(pieces), "", True
+        escape = text[position + 1:position + 2]
+        if escape != "u":
+            if not escape:
+                break
+            pieces.append(ESCAPES[escape])
+            position += 2
+            continue
+        length = 6
+        if "d800" <= text[position + 2:position + 6].lower() < "dc00":
+            # Surrogate pair
+            length = 12
+        if position + length > len(text):
+            break
+        pieces.append(json.loads('"{}"'.format(text[position:position + length])))
+        position += length
+    return "".join(pieces), text[position:], False
+
+
+def has_class(attrs, css_class):
+    for name, value in attrs:
+        if name == "class" and value and css_class in value.split():
+            return True
+    return False
+
+
+class RowExtractor(HTMLParser):
+    """Collects the html of row_tag elements (with row_class if given) inside
+    elements with container_class (of container_tag if given), as
+    (container number, html) in rows. With first_only the rest of the page
+    after the first container is ignored and done set."""
+
+    def __init__(self, container_class, row_tag, row_class=None, container_tag=None, first_only=False):
+        super().__init__(convert_charrefs=False)
+        self.container_class = container_class
+        self.container_tag = container_tag
+        self.row_tag = row_tag
+        self.row_class = row_class
+        self.first_only = first_only
+        self.rows = []
+        self.containers = 0
+        self.done = False
+        # Open elements by tag
+        self._depth = Counter()
+        # (tag, depth) of the container and of the row being read
+        self._container = None
+        self._row = None
+        self._pieces = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._depth[tag] += 1
+        if self._row:
+            self._pieces.append(self.get_starttag_text())
+        elif self._container:
+            if tag == self.row_tag and (not self.row_class or has_class(attrs, self.row_class)):
+                self._row = (tag, self._depth[tag])
+                self._pieces = [self.get_starttag_text()]
+        elif has_class(attrs, self.container_class) and self.container_tag in (None, tag):
+            self._container = (tag, self._depth[tag])
+            self.containers += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._row and not self.done:
+            self._pieces.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if self._row:
+            self._pieces.append("</{}>".format(tag))
+            if self._row == (tag, self._depth[tag]):
+                self.rows.append((self.containers, "".join(self._pieces)))
+                self._row = None
+                self._pieces = []
+        elif self._container == (tag, self._depth[tag]):
+            self._container = None
+            self.done = self.first_only
+        if self._depth[tag]:
+            self._depth[tag] -= 1
+
+    def handle_data(self, data):
+        if self._row:
+            self._pieces.append(data)
+
+    def handle_entityref(self, name):
+        if self._row:
+            self._pieces.append("&{};".format(name))
+
+    def handle_charref(self, name):
+        if self._row:
+            self._pieces.append("&#{};".format(name))
+
+
+def stream_rows(chunks, extractor):
+    """Yields (container number, row node) for the rows extractor finds in the
+    html chunks, each parsed on its own as soon as it is complete."""
+    for chunk in chunks:
+        extractor.feed(chunk)
+        yield from _parsed(extractor)
+        if extractor.done:
+            break
+    else:
+        extractor.close()
+        yield from _parsed(extractor)
+
+def _parsed(extractor):
+    rows = extractor.rows
+    extractor.rows = []
+    for container, html in rows:
+        yield container, parse_html(html).find(extractor.row_tag)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Shared copies of the strings that repeat across loaded models."""
+import sys
+import threading
+
+
+class SymbolTable:
+    """Interned strings (game titles, tiers, player keys, urls...), each with an
+    integer id for compact keys. The parsers and from_dicts put what they
+    load through it, so equal strings are the same object and compare and
+    hash by identity first.
+    Ids are given in order of first use, so they only hold within a process:
+    save the strings, not the ids."""
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __contains__(self, text):
+        return text in self._ids
+
+    def intern(self, text):
+        """The shared copy of text; anything but a str is returned as is."""
+        if type(text) is not str:
+            return text
+        symbol_id = self._ids.get(text)
+        if symbol_id is None:
+            symbol_id = self._add(text)
+        return self._strings[symbol_id]
+
+    def id_of(self, text):
+        """Id of text, added if new."""
+        symbol_id = self._ids.get(text)
+        if symbol_id is None:
+            symbol_id = self._add(text)
+        return symbol_id
+
+    def string(self, symbol_id):
+        return self._strings[symbol_id]
+
+    def ids(self, column):
+        """Ids of a column of strings (None stays None), as for table_columns exports."""
+        return [None if text is None else self.id_of(text) for text in column]
+
+    def _add(self, text):
+        # Parse workers are threads: two could add the same string at once
+        with self._lock:
+            symbol_id = self._ids.get(text)
+            if symbol_id is None:
+                symbol_id = len(self._strings)
+                self._strings.append(sys.intern(text))
+                self._ids[self._strings[symbol_id]] = symbol_id
+            return symbol_id
+
+
+SYMBOLS = SymbolTable()
+symbol = SYMBOLS.intern
+symbol_id = SYMBOLS.id_of
+
+
+def intern_attributes(obj, names):
+    """Replaces the str attributes names of obj by their shared copies."""
+    attributes = obj.__dict__
+    for name in names:
+        value = attributes.get(name)
+        if type(value) is str:
+            attributes[name] = symbol(value)
+
+def intern_tuple(values):
+    return tuple(symbol(value) for value in values)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+""" Team rosters over time, from tournament teams and transfers."""
+from bisect import bisect_right
+from urllib.parse import unquote
+
+from liquiaoe.identity import PLAYERS
+from liquiaoe.symbols import symbol
+
+JOINED = "joined"
+LEFT = "left"
+# The whole roster, as listed at a tournament
+ROSTER = "roster"
+
+
+def team_key(name):
+    """Team key of a team url key or title, the same for both
+    ('1_Fuchs_%26_Kokosnuss', '1 Fuchs & Kokosnuss' -> '1_Fuchs_&_Kokosnuss')."""
+    return symbol(unquote(name).replace(" ", "_")) if name else None
+
+
+def member_key(name, url):
+    """Player key of a (display name, url) member, as in rosters and transfers."""
+    if url:
+        return symbol(url.split("/")[-1])
+    return PLAYERS.resolve(name) or symbol(name)
+
+
+class TeamIndex:
+    """Who played for which team when. The roster listed at a team
+    tournament is the team from the tournament start (players missing from
+    it have left); transfers move players out of their old team and into
+    their new one on the transfer date.
+    Each team keeps its events and the roster after each of them sorted by
+    date, so a roster on a date is one bisect."""
+
+    def __init__(self):
+        # team -> dates, parallel (players, change) events and rosters after them
+        self._dates = {}
+        self._events = {}
+        self._rosters = {}
+        # player -> dates, parallel teams joined
+        self._player_dates = {}
+        self._player_teams = {}
+        self._seen = set()
+
+    def __len__(self):
+        """Number of teams."""
+        return len(self._dates)
+
+    def __contains__(self, team):
+        return team_key(team) in self._dates
+
+    def add_tournament(self, tournament):
+        """Adds the team rosters of a (loaded) tournament; False if already added
+        or it has no teams or dates."""
+        day = tournament.start or tournament.end
+        if not tournament.teams or not day or ("tournament", tournament.url) in self._seen:
+            return False
+        self._seen.add(("tournament", tournament.url))
+        for team in tournament.teams.values():
+            members = frozenset(member_key(name, url) for name, url in team["members"])
+            self._add(team_key(team["url"]), members, day, ROSTER)
+        return True
+
+    def add_transfer(self, transfer):
+        """False if already added or undated."""
+        if not transfer.date or ("transfer", transfer.key) in self._seen:
+            return False
+        self._seen.add(("transfer", transfer.key))
+        for name, url in transfer.players:
+            player = member_key(name, url)
+            if transfer.old:
+                self._add(team_key(transfer.old), frozenset((player,)), transfer.date, LEFT)
+            if transfer.new:
+                self._add(team_key(transfer.new), frozenset((player,)), transfer.date, JOINED)
+        return True
+
+    def add_tournaments(self, tournaments):
+        return sum(self.add_tournament(tournament) for tournament in tournaments)
+
+    def add_transfers(self, transfers):
+        return sum(self.add_transfer(transfer) for transfer in transfers)
+
+    def roster(self, team, on):
+        """Player keys in team on the date on (after that day's moves)."""
+        team = team_key(team)
+        idx = bisect_right(self._dates.get(team, ()), on)
+        if not idx:
+            return frozenset()
+        return self._rosters[team][idx - 1]
+
+    def members(self, team):
+        """Everyone who ever played for team."""
+        members = set()
+        for players, change in self._events.get(team_key(team), ()):
+            if change != LEFT:
+                members.update(players)
+        return members
+
+    def teams(self, player):
+        """Teams player played for, in the order they joined them."""
+        player = PLAYERS.resolve(player) or player
+        return list(dict.fromkeys(self._player_teams.get(player, ())))
+
+    def teams_on(self, player, on):
+        """Teams player was in on the date on."""
+        player = PLAYERS.resolve(player) or player
+        idx = bisect_right(self._player_dates.get(player, ()), on)
+        return {team for team in self._player_teams.get(player, ())[:idx]
+                if player in self.roster(team, on)}
+
+    def _add(self, team, players, day, change):
+        dates = self._dates.setdefault(team, [])
+        events = self._events.setdefault(team, [])
+        rosters = self._rosters.setdefault(team, [])
+        # After the moves of the same day already added
+        idx = bisect_right(dates, day)
+        dates.insert(idx, day)
+        events.insert(idx, (players, change))
+        rosters.insert(idx, None)
+        # Later rosters change too
+        roster = set(rosters[idx - 1]) if idx else set()
+        for position in range(idx, len(events)):
+            members, member_change = events[position]
+            if member_change == ROSTER:
+                roster = set(members)
+            elif member_change == JOINED:
+                roster.update(members)
+            else:
+                roster.difference_update(members)
+            rosters[position] = frozenset(roster)
+
+        if change == LEFT:
+            return
+        for player in players:
+            player_dates = self._player_dates.setdefault(player, [])
+            idx = bisect_right(player_dates, day)
+            player_dates.insert(idx, day)
+            self._player_teams.setdefault(player, []).insert(idx, team)
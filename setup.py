@@ -5,5 +5,6 @@ setup(name="liqui-aoe",
       author="porcpine1967",
       author_email="porcpine@gmail.com",
       description="Serialize information from liquipedia/ageofempires",
-      packages=find_packages())
+      packages=find_packages(),
+      entry_points={"console_scripts": ["liqui-aoe=liquiaoe.cli:main"]})
 
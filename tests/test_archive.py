@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+""" Tests page archive"""
+import pytest
+import vcr
+
+from liquiaoe.archive import (Archive, ArchiveError, ArchiveLoader, ArchiveWriter, Codec, PageStore,
+                              StoreLoader, cassette_pages, compression_report, convert_cassettes,
+                              train_dictionary)
+from liquiaoe.loaders import RequestsException
+from liquiaoe.managers import PlayerManager, Tournament, TournamentManager
+
+
+@pytest.fixture(scope="module")
+def archive_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("archive") / "pages.lqa"
+    assert convert_cassettes(str(path)) == 46
+    return str(path)
+
+def test_archive_roundtrip(tmp_path):
+    path = str(tmp_path / "pages.lqa")
+    with ArchiveWriter(path) as writer:
+        writer.add("Some_Page", 200, b'{"parse": {}}')
+        writer.add("Missing", 404, b"")
+    archive = Archive(path)
+    assert len(archive) == 2
+    assert "Some_Page" in archive
+    assert "Other_Page" not in archive
+    response = archive.response("Some_Page")
+    assert response.status_code == 200
+    assert response.json() == {"parse": {}}
+    assert archive.status("Missing") == 404
+
+def test_not_an_archive(tmp_path):
+    path = tmp_path / "pages.lqa"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ArchiveError):
+        Archive(str(path))
+
+def test_archive_loader(archive_path):
+    loader = ArchiveLoader(archive_path)
+    assert loader.available("/ageofempires/Samedo%27s_Civilization_Cup_2021")
+    assert loader.available("/ageofempires/Golden_League")
+    assert not loader.available("/ageofempires/N4C/1/Qualifier/2")
+    assert loader.throttle("/ageofempires/Golden_League") == 0
+
+    assert len(TournamentManager(loader).all()) == 75
+    assert len(PlayerManager(loader).tournaments("/ageofempires/Kongensgade")) == 45
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    assert len(tournament.participants) == 64
+
+def test_dictionary():
+    bodies = [body for _, _, body in cassette_pages()]
+    dictionary = train_dictionary(bodies)
+    assert 0 < len(dictionary) <= 32768
+    codec = Codec(dictionary)
+    body = bodies[0]
+    assert codec.decompress(codec.compress(body)) == body
+    assert len(codec.compress(body)) < len(Codec().compress(body))
+
+def test_compression_report():
+    report = compression_report()
+    assert report["pages"] == 46
+    assert report["compressed_with_dictionary"] < report["compressed"] < report["cassettes"]
+    assert report["compressed"] * 10 < report["bodies"]
+
+def test_archive_without_dictionary(tmp_path):
+    path = str(tmp_path / "pages.lqa")
+    convert_cassettes(path, dictionary=False)
+    loader = ArchiveLoader(path)
+    assert len(loader.soup("/ageofempires/Copa_Wallace").find_all("div", {"class": "teamcard"})) == 8
+
+def test_store_loader(tmp_path):
+    store = PageStore(str(tmp_path), b"<div class=")
+    loader = StoreLoader(store)
+    url = "/ageofempires/Ayre_Masters_Series/2"
+    assert not loader.available(url)
+    assert store.fetched_at(url) is None
+    with vcr.use_cassette("tests/vcr_cassettes/Ayre_Masters_Series/2"):
+        soup = loader.soup(url)
+    assert loader.available(url)
+    assert loader.throttle(url) == 0
+    assert store.fetched_at(url)
+    assert StoreLoader(PageStore(str(tmp_path))).soup(url).text == soup.text
+
+def test_offline_store_loader(tmp_path):
+    loader = StoreLoader(PageStore(str(tmp_path)), offline=True)
+    url = "/ageofempires/Ayre_Masters_Series/2"
+    assert loader.throttle(url) == 0
+    with pytest.raises(RequestsException) as ex:
+        loader.html(url)
+    assert ex.value.code == 404
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+""" Tests bracket graph"""
+import pytest
+
+from liquiaoe.brackets import Bracket, NO_MATCH
+from liquiaoe.loaders import VcrLoader
+from liquiaoe.managers import MatchResult, Tournament
+
+
+@pytest.fixture
+def loader():
+    return VcrLoader()
+
+def test_single_elimination(loader):
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    bracket = tournament.bracket
+    assert bracket.round_count == 6
+    assert len(bracket) == 63
+    assert bracket.alive() == {"TheViper"}
+    assert bracket.eliminated_in("DauT") == 5
+    assert bracket.eliminated_in("Faraday") == 0
+    path = bracket.path("Villese")
+    assert [match.loser for match in path] == ["D3rp", "Overtaken", "Villese"]
+    assert bracket.standings()[:2] == [("TheViper", None), ("DauT", 5)]
+
+    first = bracket.path("TheViper")[0]
+    idx = bracket.matches.index(first)
+    assert bracket.round[idx] == 0
+    assert bracket.next_match(idx, "TheViper") != NO_MATCH
+    assert bracket.next_match(idx, first.loser) == NO_MATCH
+    assert idx in bracket.parents[bracket.next_match(idx, "TheViper")]
+
+def test_double_elimination(loader):
+    tournament = Tournament("/ageofempires/Master_of_HyperRandom", loader=loader)
+    bracket = tournament.bracket
+    assert bracket.alive() == {"Villese"}
+    path = bracket.path("Villese")
+    assert len(path) == 8
+    assert path[1].loser == "Villese"
+    assert bracket.eliminated_in("TaToH") == bracket.round_count - 1
+
+def test_empty_bracket():
+    bracket = Bracket()
+    assert not bracket.path("TheViper")
+    assert bracket.eliminated_in("TheViper") is None
+    assert bracket.standings() == []
+
+def test_bracket_in_progress():
+    def match(winner, loser, played=True):
+        return MatchResult.from_dict({"winner": winner, "loser": loser, "winner_url": None,
+                                      "loser_url": None, "date": None, "played": played,
+                                      "tournament": "/ageofempires/Cup", "score": "", "game": None})
+    # Pending matches have no winner, the parser leaves a player in loser;
+    # C beat D by forfeit
+    bracket = Bracket([[match("A", "B"), match("C", "D", False)], [match(None, "C", False)]])
+    assert bracket.alive() == {"A", "C"}
+    assert bracket.eliminated_in("C") is None
+    assert len(bracket.path("C")) == 2
+    assert bracket.next_match(1, "C") == 2
+    assert bracket.standings() == [("A", None), ("C", None), ("B", 0), ("D", 0)]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+""" Tests parse result cache"""
+from datetime import date
+
+import pytest
+
+from liquiaoe import managers
+from liquiaoe.cache import ParseCache
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import (PARSER_VERSIONS, MatchResultsManager, PlayerManager, Tournament,
+                               TournamentManager, TransferManager)
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = ReplayLoader()
+    loader.parse_cache = ParseCache(str(tmp_path))
+    return loader
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    def fail(*_):
+        raise AssertionError("parsed html")
+    return lambda: monkeypatch.setattr(managers, "parse_html", fail)
+
+def test_tournament_cache(loader, no_parsing):
+    first = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    first.load_advanced(loader)
+    no_parsing()
+    second = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    second.load_advanced(loader)
+    assert second.to_dict() == first.to_dict()
+    assert second.participants == first.participants
+    assert second.participants[5] == ("Capoch", "/ageofempires/Capoch", '5th-8th', '$812.50',)
+    assert [len(round_) for round_ in second.rounds] == [32, 16, 8, 4, 2, 1]
+    assert second.bracket.alive() == {"TheViper"}
+    assert second.start == date(2022, 1, 8)
+    assert second.prize_table.amounts == first.prize_table.amounts
+
+def test_team_tournament_cache(loader, no_parsing):
+    Tournament("/ageofempires/Samedo%27s_Civilization_Cup_2021").load_advanced(loader)
+    no_parsing()
+    tournament = Tournament("/ageofempires/Samedo%27s_Civilization_Cup_2021", loader=loader)
+    assert tournament.first_place == "oSetinhas & OMurchu (oSetinhas, OMurchu)"
+    assert all(isinstance(member, tuple) for team in tournament.teams.values() for member in team["members"])
+
+def test_context(loader):
+    Tournament("/ageofempires/Copa_Libertadores_3K").load_advanced(loader)
+    tournament = Tournament("/ageofempires/Copa_Libertadores_3K")
+    tournament.start = date(2023, 11, 1)
+    tournament.end = date(2023, 12, 1)
+    tournament.load_advanced(loader)
+    assert tournament.start == date(2023, 11, 1)
+
+def test_manager_caches(loader, no_parsing):
+    portal = TournamentManager(loader).all()
+    viper = PlayerManager(loader).tournaments("/ageofempires/TheViper")
+    matches = PlayerManager(loader).matches("/ageofempires/JorDan_AoE")
+    transfers = TransferManager(loader).transfers
+    results = MatchResultsManager(loader).match_results
+    no_parsing()
+    assert [t.to_dict() for t in TournamentManager(loader).all()] == [t.to_dict() for t in portal]
+    assert [t.to_dict() for t in PlayerManager(loader).tournaments("/ageofempires/TheViper")] == [t.to_dict() for t in viper]
+    assert PlayerManager(loader).matches("/ageofempires/JorDan_AoE")[58].end == matches[58].end
+    assert [t.key for t in TransferManager(loader).transfers] == [t.key for t in transfers]
+    assert [r.signature for r in MatchResultsManager(loader).match_results] == [r.signature for r in results]
+
+def test_version_bump(loader, tmp_path):
+    Tournament("/ageofempires/Wrang_of_Fire/3").load_advanced(loader)
+    html = loader.html("/ageofempires/Wrang_of_Fire/3")
+    context = Tournament("/ageofempires/Wrang_of_Fire/3").parse_context()
+    assert loader.parse_cache.get("tournament", html, context)
+    bumped = ParseCache(str(tmp_path), dict(PARSER_VERSIONS, tournament=PARSER_VERSIONS["tournament"] + 1))
+    assert bumped.get("tournament", html, context) is None
+    assert bumped.prune() == 1
+    assert loader.parse_cache.get("tournament", html, context) is None
+
+def test_multiple_portals_unchanged(loader, no_parsing):
+    pages = ["/ageofempires/Portal:Tournaments", "/ageofempires/Age_of_Empires_IV/Tournaments"]
+    manager = TournamentManager(loader, pages)
+    no_parsing()
+    again = TournamentManager(loader, pages)
+    assert [t.to_dict() for t in again.all()] == [t.to_dict() for t in manager.all()]
+    again.refresh(pages[1:])
+    assert len(again.all()) == len(manager.all())
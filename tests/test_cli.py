@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+""" Tests liqui-aoe command"""
+import pytest
+
+from liquiaoe.archive import PageStore, cassette_pages
+from liquiaoe.cli import main
+from liquiaoe.managers import Transfer
+from liquiaoe.store import Store
+
+
+@pytest.fixture
+def pages(tmp_path):
+    directory = str(tmp_path / "pages")
+    page_store = PageStore(directory)
+    for page, status, body in cassette_pages():
+        if status == 200:
+            page_store.put("/ageofempires/" + page, body)
+    return directory
+
+def test_refresh_and_query(tmp_path, capsys):
+    store = str(tmp_path / "liquiaoe.db")
+    assert main(["--store", store, "--loader", "replay", "refresh", "--journal", str(tmp_path / "journal"),
+                 "--tournament", "/ageofempires/Wandering_Warriors_Cup", "--no-players"]) == 0
+    assert "fetched 1, resumed 0, skipped 0" in capsys.readouterr().out
+    assert main(["--store", store, "query", "completed", "2022-02-01", "2022-02-28"]) == 0
+    out = capsys.readouterr().out
+    assert "/ageofempires/Wandering_Warriors_Cup" in out
+    assert main(["--store", store, "query", "history", "TheViper"]) == 0
+    assert "\tTheViper\t" in capsys.readouterr().out
+    assert main(["--store", store, "query", "completed", "2022-01-01"]) == 2
+
+def test_query_transfers(tmp_path, capsys):
+    path = str(tmp_path / "liquiaoe.db")
+    store = Store(path)
+    store.save_transfers([Transfer.from_dict({"date": None, "players": [("Hera", "/ageofempires/Hera")],
+                                              "old": "GamerLegion", "new": None, "ref": None})])
+    store.close()
+    assert main(["--store", path, "query", "transfers"]) == 0
+    assert capsys.readouterr().out == "\tHera\tGamerLegion\t\n"
+
+def test_rebuild(tmp_path, pages, capsys):
+    store_path = str(tmp_path / "liquiaoe.db")
+    assert main(["--store", store_path, "--pages", pages, "rebuild", "--processes", "2",
+                 "--portal", "/ageofempires/Portal:Tournaments",
+                 "--tournament", "/ageofempires/Wandering_Warriors_Cup"]) == 0
+    captured = capsys.readouterr()
+    rebuilt = int(captured.out.split()[1])
+    assert 0 < rebuilt < 76
+    assert captured.err.count("skipped tournament") == 76 - rebuilt
+    store = Store(store_path)
+    assert len(store.tournaments("/ageofempires/Portal:Tournaments")) == 75
+    assert store.tournament("/ageofempires/Wandering_Warriors_Cup").first_place == "TheViper"
+    admirals = store.tournament("/ageofempires/AoE2_Admirals_League/2")
+    assert admirals.game == "Age of Empires II"
+    assert admirals.organizers == ['Admirals Esports']
+    assert store.player_results("/ageofempires/TheViper")[68].name == "Winter Championship"
+    store.close()
+
+def test_bench(pages, capsys):
+    assert main(["--pages", pages, "bench", "--tournament", "/ageofempires/Wandering_Warriors_Cup",
+                 "--tournament", "/ageofempires/AoE2_Admirals_League/2",
+                 "--tournament", "/ageofempires/Wrang_of_Fire/3",
+                 "--player", "/ageofempires/TheViper"]) == 0
+    captured = capsys.readouterr()
+    assert " 3 tournaments" in captured.err
+    assert "skipped" not in captured.err
+    assert captured.out.startswith("total ")
+
+def test_bench_workers(pages, capsys):
+    assert main(["--pages", pages, "bench", "--workers", "2",
+                 "--tournament", "/ageofempires/Wandering_Warriors_Cup",
+                 "--tournament", "/ageofempires/Not_Recorded"]) == 0
+    captured = capsys.readouterr()
+    assert " 1 tournaments" in captured.err
+    assert "skipped tournament /ageofempires/Not_Recorded" in captured.err
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+""" Tests the cross-tournament player index"""
+import pytest
+
+from liquiaoe.identity import PLAYERS, PlayerIndex
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import Tournament, TransferManager
+from liquiaoe.ratings import MatchStats
+
+
+@pytest.fixture
+def players():
+    PLAYERS.clear()
+    yield PLAYERS
+    PLAYERS.clear()
+
+def test_player_index():
+    index = PlayerIndex()
+    index.add("TheViper", "/ageofempires/TheViper", ("The Viper",))
+    index.add("Hera", "/ageofempires/Hera", ("Hera",))
+    index.add("Trundo", None, ("trundo",))
+    assert index.resolve("The Viper") == index.resolve("/ageofempires/TheViper") == "TheViper"
+    assert index.resolve("trundo") == "Trundo"
+    assert index.url("TheViper") == "/ageofempires/TheViper"
+    assert index.url("Trundo") is None
+    assert len(index) == 3
+    # Shown as someone else's key: keys win
+    index.add("Hera2", "/ageofempires/Hera2", ("Hera",))
+    assert index.resolve("Hera") == "Hera"
+    # The same display name for two players resolves to neither
+    index.add("Mbl", "/ageofempires/Mbl", ("Mr Bl",))
+    index.add("MrBlue", "/ageofempires/MrBlue", ("Mr Bl",))
+    assert index.resolve("Mr Bl") is None
+    index.add("Mbl", "/ageofempires/Mbl", ("Mr Bl",))
+    assert index.resolve("Mr Bl") is None
+    assert "Mr Bl" not in index
+    assert "Mbl" in index
+
+def test_built_from_loads(players):
+    loader = ReplayLoader()
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    for name, player in tournament.participant_lookup.items():
+        assert players.resolve(name) == player[0]
+        assert players.url(player[0]) == player[1]
+    transferred = [player for transfer in TransferManager(loader).transfers
+                   for player in transfer.players if player[1]]
+    assert transferred
+    for name, url in transferred:
+        assert players.resolve(url) == url.split("/")[-1]
+        assert players.url(url.split("/")[-1]) == url
+
+def test_matches_resolved_across_tournaments(players):
+    loader = ReplayLoader()
+    url = "/ageofempires/Wandering_Warriors_Cup"
+    tournament = Tournament(url)
+    tournament.load_advanced(loader)
+    expected = MatchStats()
+    expected.add_all(tournament.matches)
+
+    # A page that does not list its participants: the parse keeps the names
+    # shown, whatever was loaded before
+    unlisted = Tournament(url)
+    unlisted.load_participant_lookup = lambda node: None
+    unlisted.load_advanced(loader)
+    assert unlisted.participant_lookup == {}
+    assert [match.winner_url for match in unlisted.matches if match.winner_url] == []
+    names = {match.winner for match in unlisted.matches} - {match.winner for match in tournament.matches}
+    assert names
+    players.clear()
+    again = Tournament(url)
+    again.load_participant_lookup = lambda node: None
+    again.load_advanced(loader)
+    assert [match.to_dict() for match in again.matches] == [match.to_dict() for match in unlisted.matches]
+
+    # Resolved when aggregated
+    players.add_lookup(tournament.participant_lookup)
+    stats = MatchStats()
+    stats.add_all(unlisted.matches)
+    assert stats.ranking() == expected.ranking()
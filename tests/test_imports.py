@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+""" Guards import time: heavy dependencies load on first use only"""
+import subprocess
+import sys
+
+MODULES = ("liquiaoe.loaders", "liquiaoe.managers", "liquiaoe.archive", "liquiaoe.cache",
+           "liquiaoe.refresh", "liquiaoe.store", "liquiaoe.cli", "liquiaoe.pipeline",
+           "liquiaoe.prefetch", "liquiaoe.plan", "liquiaoe.stream",
+           "liquiaoe.symbols", "liquiaoe.identity", "liquiaoe.ratings",
+           "liquiaoe.teams")
+LAZY = ("bs4", "requests", "vcr", "yaml")
+
+
+def imported(code):
+    """Top level packages python -X importtime reports for code."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             capture_output=True, text=True, check=True)
+    packages = set()
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            packages.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return packages
+
+def test_lazy_imports():
+    packages = imported("import {}".format(", ".join(MODULES)))
+    assert "liquiaoe" in packages
+    assert not packages.intersection(LAZY)
+
+def test_imported_on_use():
+    packages = imported("from liquiaoe.loaders import parse_html; parse_html('<p>')")
+    assert "bs4" in packages
+    assert not packages.intersection(("requests", "vcr", "yaml"))
@@ -2,10 +2,11 @@
 """ Tests loaders"""
 import time
 
+import requests
 import vcr
 import pytest
 
-from liquiaoe.loaders import HttpsLoader, VcrLoader, THROTTLE
+from liquiaoe.loaders import HttpsLoader, ReplayLoader, RequestsException, VcrLoader, THROTTLE
 
 @pytest.fixture
 def availability_urls():
@@ -44,3 +45,63 @@ def test_debugging_removed():
     with open("liquiaoe/managers.py") as f:
         for l in f:
             assert "print(" not in l
+
+def test_replay_loader(tmp_path, availability_urls):
+    loader = ReplayLoader(str(tmp_path))
+    for url, available in availability_urls:
+        assert loader.available(url) == available
+        assert loader.throttle(url) == (0 if available else THROTTLE)
+    soup = loader.soup("/ageofempires/Samedo%27s_Civilization_Cup_2021")
+    assert (tmp_path / "Samedo%27s_Civilization_Cup_2021.json").exists()
+    assert loader.soup("/ageofempires/Samedo%27s_Civilization_Cup_2021").text == soup.text
+    assert VcrLoader().soup("/ageofempires/Golden_League").text == loader.soup("/ageofempires/Golden_League").text
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def get(self, url, timeout, stream=False):
+        assert stream
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+class UnthrottledLoader(HttpsLoader):
+    def throttle(self, _):
+        return 0
+
+def test_retries():
+    loader = UnthrottledLoader(backoff=0)
+    unavailable = FakeResponse(503)
+    loader._session = FakeSession((unavailable, requests.ConnectionError(), FakeResponse(200)))
+    assert loader.fetch_response("https://example.com", "/ageofempires/X").status_code == 200
+    assert loader._session.calls == 3
+    # Retried responses are not read, their connection goes back to the pool
+    assert unavailable.closed
+
+    loader = UnthrottledLoader(retries=1, backoff=0)
+    loader._session = FakeSession((FakeResponse(429, {"Retry-After": "0"}), FakeResponse(429), FakeResponse(200)))
+    assert loader.fetch_response("https://example.com", "/ageofempires/X").status_code == 429
+
+    loader = UnthrottledLoader(retries=0)
+    loader._session = FakeSession((requests.Timeout(),))
+    with pytest.raises(RequestsException) as ex:
+        loader.fetch_response("https://example.com", "/ageofempires/X")
+    assert ex.value.code == 503
+
+def test_session_reused():
+    loader = HttpsLoader()
+    assert loader.session is loader.session
+    assert loader.session.headers["User-Agent"].startswith("liqui-aoe")
@@ -1,22 +1,26 @@
 #!/usr/bin/env python3
 from collections import Counter
 from datetime import date
+import json
 import pytest
-from liquiaoe.managers import Tournament, TournamentManager, PlayerManager, TransferManager, MatchResultsManager
-from liquiaoe.loaders import VcrLoader
+from bs4.element import Tag
+from liquiaoe.managers import (Tournament, TournamentManager, PlayerManager, TransferManager,
+                               MatchResultsManager, node_from_class, transfer_date)
+from liquiaoe.loaders import ReplayLoader, RequestsException, VcrLoader, parse_html
 
 
 @pytest.fixture
 def loader():
-    return VcrLoader()
+    return ReplayLoader()
 
-@pytest.fixture
-def tournament_manager():
-    return TournamentManager(VcrLoader())
+# Managers are checked against both the vcr path and the direct cassette reader
+@pytest.fixture(params=[ReplayLoader, VcrLoader])
+def tournament_manager(request):
+    return TournamentManager(request.param())
 
-@pytest.fixture
-def player_manager():
-    return PlayerManager(VcrLoader())
+@pytest.fixture(params=[ReplayLoader, VcrLoader])
+def player_manager(request):
+    return PlayerManager(request.param())
 
 def print_info(tournaments):
     for idx, tournament in enumerate(tournaments):
@@ -469,6 +473,25 @@ def test_subtournament_yaml(loader):
     tournament.load_advanced(loader)
     assert tournament.sponsors[0] == "Almojo"
 
+def test_extra_dedupe_and_jsonl(loader, tmp_path):
+    manager = TournamentManager(loader)
+    manager.load_extra('tests/data/subtournament.yaml')
+    manager.load_extra('tests/data/subtournament.yaml')
+    assert len(manager.all()) == 76
+    extra = manager.all()[-1]
+    assert extra.prize_amount == 3950.0
+    assert extra.end == date(2002, 12, 9)
+    filepath = tmp_path / "extra.jsonl"
+    snapshots = [manager.all()[0].to_dict(), extra.to_dict(),
+                 dict(extra.to_dict(), url="/ageofempires/Other_Tourney")]
+    filepath.write_text("\n".join(json.dumps(snapshot) for snapshot in snapshots) + "\n")
+    other = TournamentManager(loader)
+    other.load_extra(str(filepath))
+    assert [t.url for t in other.all()[75:]] == ['/ageofempires/MFO_AOC_Tourney', '/ageofempires/Other_Tourney']
+    assert other.all()[75].extra
+    assert other.all()[75].start == date(2002, 11, 9)
+    assert other.all()[75].prize_amount == 3950.0
+
 def test_team_tbd(loader):
     tournament = Tournament('/ageofempires/Terra_Nova_Duos')
     tournament.load_advanced(loader)
@@ -554,6 +577,26 @@ def test_player_matches(loader):
     assert not match.played
     assert not matches[270].played
 
+def test_player_columns(loader):
+    manager = PlayerManager(loader)
+    page = loader.soup("/ageofempires/TheViper/Results")
+    columns = manager.results_columns(node_from_class(page, "wikitable").find_all("tr"),
+                                      "/ageofempires/TheViper")
+    tournaments = manager.tournaments("/ageofempires/TheViper")
+    assert len(columns["end"]) == len(tournaments) == 286
+    assert columns["url"][68] == "/ageofempires/Winter_Championship/AoE4/2022"
+    assert columns["prize"][68] == "$1,500"
+    assert sum(columns["team"]) == sum(tournament.team for tournament in tournaments)
+    assert Counter(columns["tier"])["S-Tier"] == sum(t.tier == "S-Tier" for t in tournaments)
+    page = loader.soup("/ageofempires/JorDan_AoE/Matches")
+    columns = manager.matches_columns(node_from_class(page, "wikitable").find_all("tr"))
+    assert len(columns["played"]) == 305
+    assert columns["end"][58] == date(2022, 7, 29)
+    assert columns["tier"][58] == "S-Tier"
+    # Rows of the same day share the parsed date
+    assert len(set(columns["end"])) < len(columns["end"])
+    assert len({id(day) for day in columns["end"]}) == len(set(columns["end"]))
+
 def test_prize_pool_div(loader):
     tournament = Tournament('/ageofempires/Death_Match_World_Cup/5/Qualifier')
     tournament.load_advanced(loader)
@@ -586,3 +629,125 @@ def test_bad_dates(loader):
     tournament.load_advanced(loader)
     assert tournament.start == date(2023, 11, 1)
     assert tournament.end == date(2023, 12, 1)
+
+def test_transfer_refresh(loader):
+    manager = TransferManager(loader)
+    assert len(manager.refresh()) == 30
+    assert manager.refresh() == []
+    assert len(manager.transfers) == 30
+    transfers = manager.between(date(2023, 4, 11), date(2023, 4, 14))
+    assert len(transfers) == 9
+    assert transfers[0].players[0][0] == 'BL4CK'
+    assert transfers[-1].date == date(2023, 4, 11)
+
+def test_parse_newer_transfers(loader):
+    manager = TransferManager(loader)
+    soup = loader.soup(TransferManager.PORTAL)
+    transfers = manager.parse_transfers(soup, date(2023, 5, 1))
+    assert transfers
+    assert all(transfer.date >= date(2023, 5, 1) for transfer in transfers)
+    assert len(transfers) == len([t for t in manager.transfers if t.date >= date(2023, 5, 1)])
+    undated = parse_html('<div class="divRow"><div class="divCell Name">x</div></div>')
+    assert transfer_date(undated.div) is None
+    assert len(manager.parse_transfers(undated, date(2023, 5, 1))) == 1
+
+def test_match_results_poll(loader):
+    manager = MatchResultsManager(loader)
+    events = manager.poll()
+    assert len(events) == 49
+    assert events[0][0] == MatchResultsManager.NEW
+    assert events[0][1].score == '2-0'
+    assert manager.poll() == []
+    assert len(manager.match_results) == 49
+
+    manager._signatures[events[1][1].key] = (None, None, "", False)
+    events = manager.poll()
+    assert len(events) == 1
+    assert events[0][0] == MatchResultsManager.CHANGED
+    assert list(manager.watch(0, polls=2)) == []
+
+def test_lazy_tournament(loader):
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup", loader=loader)
+    assert not tournament.loaded
+    assert tournament.first_place
+    assert tournament.loaded
+    assert "matches" not in tournament.__dict__
+    # Only the html is kept for the details, not the page tree
+    assert isinstance(tournament._html, str)
+    assert not any(isinstance(value, Tag) for value in tournament.__dict__.values())
+    assert len(tournament.rounds) == 6
+    assert "matches" not in tournament.__dict__
+    assert len(tournament.participants) == 64
+    assert tournament.rounds[0][5].winner == "The_Dragonstar"
+    assert len(tournament.links) == 6
+    assert tournament.matches
+    assert tournament._html is None
+
+class FlakyLoader(ReplayLoader):
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def html(self, path):
+        if self.failures:
+            self.failures -= 1
+            raise RequestsException("flaky", 503)
+        return super().html(path)
+
+ARCHIVES = ["/ageofempires/Portal:Tournaments", "/ageofempires/Age_of_Empires_IV/Tournaments",
+            "/ageofempires/Age_of_Empires_II/Tournaments/Pre_2020"]
+
+def test_multiple_portals(loader):
+    manager = TournamentManager(loader, ARCHIVES)
+    urls = [tournament.url for tournament in manager.all()]
+    assert len(urls) == len(set(urls)) == 980
+    assert manager.tournament("/ageofempires/La_Baguette_d%27Or").start == date(2019, 9, 23)
+    timebox = (date(2023, 5, 25), date(2023, 5, 31),)
+    assert len(manager.completed(timebox)["Age of Empires IV"]) >= 5
+    # Already listed by the archive
+    manager.load_extra('tests/data/subtournament.yaml')
+    assert len(manager.all()) == 980
+    assert not manager.tournament('/ageofempires/MFO_AOC_Tourney').extra
+
+def test_portal_conflicts(loader):
+    manager = TournamentManager(loader, ARCHIVES[:2])
+    url = "/ageofempires/Kings_and_Castles/2"
+    first, second = (next(t for t in manager._pages[page] if t.url == url) for page in ARCHIVES[:2])
+    first.name = ""
+    second.name = "Kings and Castles 2"
+    first.cancelled = True
+    manager.merge()
+    merged = manager.tournament(url)
+    assert merged.name == "Kings and Castles 2"
+    assert merged.cancelled
+    assert merged in manager.all()
+
+def test_lazy_tournament_fetch_failure():
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup", loader=FlakyLoader())
+    with pytest.raises(RequestsException):
+        tournament.organizers
+    assert not tournament.loaded
+    assert tournament.first_place == "TheViper"
+    assert tournament.loaded
+
+def test_unloaded_to_dict(loader):
+    tournament = TournamentManager(loader).all()[27]
+    data = tournament.to_dict()
+    assert "first_place" in data
+    assert "organizers" not in data and "matches" not in data
+    bound = Tournament.from_dict(data, loader)
+    assert not bound.loaded
+    assert bound.organizers == ['Admirals Esports']
+    assert bound.loaded
+    assert len(bound.participants) == 32
+
+def test_lazy_tournament_manager(loader):
+    manager = TournamentManager(loader, lazy=True)
+    tournament = manager.all()[43]
+    assert tournament.first_place == "Fenix"
+    assert not tournament.loaded
+    manager.load_extra('tests/data/subtournament.yaml')
+    tournament = manager.all()[-1]
+    assert tournament.sponsors[0] == "Almojo"
+    assert tournament.loaded
+    assert "participant_lookup" not in tournament.__dict__
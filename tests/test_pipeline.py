@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+""" Tests pipelined fetch and parse"""
+import time
+
+from liquiaoe.loaders import ReplayLoader, RequestsException
+from liquiaoe.managers import Tournament, TransferManager
+from liquiaoe.pipeline import Pipeline, load_tournaments, player_tournaments
+
+URLS = ("/ageofempires/Wandering_Warriors_Cup", "/ageofempires/Wrang_of_Fire/3",
+        "/ageofempires/AoE2_Admirals_League/2")
+
+
+class OfflineLoader(ReplayLoader):
+    """Cassettes only, with a fixed wait standing in for throttle and network."""
+
+    def __init__(self, wait=0):
+        super().__init__()
+        self.wait = wait
+
+    def html(self, path):
+        if not self.available(path):
+            raise RequestsException("missing", 404)
+        time.sleep(self.wait)
+        return super().html(path)
+
+
+def test_load_tournaments():
+    tournaments = [Tournament(url) for url in URLS + ("/ageofempires/Not_Recorded",)]
+    failed = load_tournaments(OfflineLoader(), tournaments, workers=2)
+    assert list(failed) == ["/ageofempires/Not_Recorded"]
+    assert failed["/ageofempires/Not_Recorded"].code == 404
+    for tournament in tournaments[:3]:
+        expected = Tournament(tournament.url)
+        expected.load_advanced(ReplayLoader())
+        assert tournament.to_dict() == expected.to_dict()
+    assert tournaments[0].bracket.alive() == {"TheViper"}
+
+def test_player_tournaments():
+    results, failed = player_tournaments(OfflineLoader(), ["/ageofempires/TheViper", "/ageofempires/Kongensgade"])
+    assert failed == {}
+    assert results["/ageofempires/TheViper"][68].name == "Winter Championship"
+    assert len(results["/ageofempires/Kongensgade"]) == 45
+
+def test_submit_while_iterating():
+    with Pipeline(OfflineLoader()) as pipeline:
+        pipeline.submit((TransferManager.PORTAL,), lambda page: TransferManager(page).transfers, "transfers")
+        tags = []
+        for tag, result, error in pipeline.results():
+            assert error is None
+            tags.append(tag)
+            if tag == "transfers":
+                assert len(result) == 30
+                pipeline.submit((URLS[0],), lambda page: Tournament(URLS[0]).load_advanced(page), "next")
+    assert tags == ["transfers", "next"]
+
+def test_parse_overlaps_fetch():
+    wait = 0.3
+
+    def parse(page):
+        time.sleep(wait)
+        return page
+
+    started = time.perf_counter()
+    with Pipeline(OfflineLoader(wait), workers=1) as pipeline:
+        for url in URLS * 2:
+            pipeline.submit((url,), parse)
+        assert all(error is None for _, _, error in pipeline.results())
+    # Sequential is 12 waits, pipelined about 7
+    assert time.perf_counter() - started < 9.5 * wait
+
+def test_failure_cancels_pending():
+    wait = 0.3
+    loader = OfflineLoader(wait)
+    started = time.perf_counter()
+    try:
+        with Pipeline(loader, workers=1) as pipeline:
+            for url in URLS * 3:
+                pipeline.submit((url,), lambda page: page)
+            for _ in pipeline.results():
+                raise ValueError("consumer failed")
+    except ValueError:
+        pass
+    # Not the 9 fetches submitted, at most the one on the wire
+    assert time.perf_counter() - started < 4 * wait
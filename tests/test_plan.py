@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Tests refresh planning"""
+import os
+import time
+
+from liquiaoe.archive import PageStore, StoreLoader
+from liquiaoe.cli import main
+from liquiaoe.loaders import THROTTLE, ReplayLoader
+from liquiaoe.plan import CACHED, MISSING, STALE, TRANSFERS, plan
+from liquiaoe.refresh import PLAYER, PORTAL, TOURNAMENT, Journal
+
+WRANG = "/ageofempires/Wrang_of_Fire/3"
+SEEDS = [(TOURNAMENT, WRANG), (TOURNAMENT, "/ageofempires/Not_Recorded"),
+         (TRANSFERS, "/ageofempires/Portal:Transfers")]
+
+
+def test_plan():
+    planned = plan(ReplayLoader(), SEEDS)
+    assert planned.summary() == {"steps": 17, "cached": 2, "stale": 0, "missing": 15,
+                                 "calls": 15, "max_calls": 29, "eta": 15 * THROTTLE,
+                                 "max_eta": 29 * THROTTLE, "unexplored": 1, "dropped": 0}
+    assert [step.path for step in planned.unexplored()] == ["/ageofempires/Not_Recorded"]
+    players = [step for step in planned.steps if step.kind == PLAYER]
+    assert len(players) == 14
+    assert players[0].pages == [("/ageofempires/ACCM/Results", MISSING), ("/ageofempires/ACCM", MISSING)]
+    assert plan(ReplayLoader(), SEEDS, players=False).calls == 1
+
+def test_player_fallback(tmp_path):
+    store = PageStore(str(tmp_path))
+    loader = ReplayLoader()
+    store.put("/ageofempires/TheViper/Results", loader.fetch_response(None, "/ageofempires/TheViper/Results").content)
+    store.put("/ageofempires/Kongensgade", b"{}")
+    planned = plan(StoreLoader(store), [(PLAYER, "/ageofempires/TheViper"), (PLAYER, "/ageofempires/Kongensgade")])
+    viper, kongensgade = planned.steps
+    assert viper.pages == [("/ageofempires/TheViper/Results", CACHED)]
+    assert (viper.calls, viper.max_calls) == (0, 0)
+    # One call for the results page, if that is a 404 the player page is there
+    assert kongensgade.pages == [("/ageofempires/Kongensgade/Results", MISSING),
+                                 ("/ageofempires/Kongensgade", CACHED)]
+    assert (kongensgade.calls, kongensgade.max_calls) == (1, 1)
+
+def test_trim():
+    planned = plan(ReplayLoader(), SEEDS)
+    trimmed = planned.trim(5 * THROTTLE)
+    # Tournaments and transfers first, then as many players (two calls each) as fit
+    assert [step.kind for step in trimmed.steps] == [TOURNAMENT, TOURNAMENT, TRANSFERS, PLAYER, PLAYER]
+    assert trimmed.max_eta <= 5 * THROTTLE
+    assert len(trimmed.dropped) == 12
+    assert planned.trim(0).calls == 0
+    last = planned.trim(2 * THROTTLE, priority=lambda step: step.path != "/ageofempires/Vinchester")
+    assert [step.path for step in last.steps if step.calls] == ["/ageofempires/Vinchester"]
+
+def test_stale_pages(tmp_path):
+    store = PageStore(str(tmp_path))
+    loader = ReplayLoader()
+    for page in (WRANG, "/ageofempires/TheViper/Results"):
+        store.put(page, loader.fetch_response(None, page).content)
+    old = time.time() - 3600
+    os.utime(store.filepath(WRANG), (old, old))
+    store_loader = StoreLoader(store, max_age=600)
+    assert not store_loader.available(WRANG)
+    assert StoreLoader(store, offline=True, max_age=600).available(WRANG)
+
+    planned = plan(store_loader, [(TOURNAMENT, WRANG), (PLAYER, "/ageofempires/TheViper")])
+    # Followed from the old copy
+    assert planned.steps[0].pages == [(WRANG, STALE)]
+    assert planned.steps[0].explored
+    assert planned.statuses() == {STALE: 1, CACHED: 1, MISSING: 14}
+    assert planned.calls == 15
+
+def test_journal(tmp_path):
+    journal_path = str(tmp_path / "journal")
+    Journal(journal_path).record_done(TOURNAMENT, WRANG, [(PLAYER, "/ageofempires/ACCM")])
+    planned = plan(ReplayLoader(), [(PORTAL, "/ageofempires/Not_Recorded"), (TOURNAMENT, WRANG)],
+                   journal_path=journal_path)
+    assert [step.path for step in planned.steps] == ["/ageofempires/Not_Recorded", "/ageofempires/ACCM"]
+
+def test_dry_run(tmp_path, capsys):
+    store = str(tmp_path / "liquiaoe.db")
+    assert main(["--store", store, "--loader", "replay", "refresh", "--dry-run", "--budget", "200",
+                 "--journal", str(tmp_path / "journal"), "--tournament", WRANG, "--transfers"]) == 0
+    out = capsys.readouterr().out
+    assert "cached\ttournament\t{}\n".format(WRANG) in out
+    assert out.splitlines()[-1] == "3 calls (at most 6), eta 96s (at most 192s), " \
+                                   "0 pages not followed, 11 dropped"
+    assert not os.path.exists(store)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+""" Tests idle-budget prefetching"""
+from datetime import date
+import threading
+import time
+
+import pytest
+
+from liquiaoe.loaders import ReplayLoader, RequestsException
+from liquiaoe.managers import MatchResultsManager, TournamentManager
+from liquiaoe.prefetch import Prefetcher, candidates, tournament_url
+
+THROTTLE = 0.2
+URLS = ["/ageofempires/Wandering_Warriors_Cup", "/ageofempires/Wrang_of_Fire/3",
+        "/ageofempires/AoE2_Admirals_League/2"]
+
+
+class ThrottledLoader(ReplayLoader):
+    """Cassettes behind a short throttle, remembering the calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def throttle(self, _):
+        return THROTTLE
+
+    def update_last_call(self, path):
+        self.calls.append(path)
+        self.last_call = time.time()
+
+    def actually_calling(self, path):
+        pass
+
+    def html(self, path):
+        # Never a real call for a page without a cassette
+        if not self.available(path):
+            raise RequestsException("missing", 404)
+        return super().html(path)
+
+
+@pytest.fixture(scope="module")
+def tournament_manager():
+    return TournamentManager(ReplayLoader())
+
+def test_candidates(tournament_manager):
+    match_results = MatchResultsManager(ReplayLoader()).match_results
+    urls = candidates(tournament_manager, match_results, date(2023, 5, 31))
+    # S-Tier with matches played today
+    assert urls[0] == "/ageofempires/Meta_Plays/Age_of_Mythology/Season_5/The_Wisdom_of_Thoth"
+    # Weekly that started three days ago
+    assert urls[-1] == "/ageofempires/Rising_Empires_Weeklies/35/The_Warchief_Club"
+    assert urls.index("/ageofempires/House_of_Cancer") < urls.index("/ageofempires/Liga_Desierto")
+    assert "/ageofempires/The_Elite_Classic/Silver_League/Group_Stage" not in urls
+    assert candidates(tournament_manager, today=date(2022, 1, 1)) == []
+
+def test_tournament_url(tournament_manager):
+    assert tournament_url(tournament_manager, "/ageofempires/The_Elite_Classic/Silver_League/Group_Stage") \
+        == "/ageofempires/The_Elite_Classic/Silver_League"
+    assert tournament_url(tournament_manager, "/ageofempires/Unknown/Group_Stage") \
+        == "/ageofempires/Unknown/Group_Stage"
+
+def test_prefetch_when_idle():
+    loader = ThrottledLoader()
+    saved = []
+    with Prefetcher(loader, handler=lambda path, html: saved.append(path)) as prefetcher:
+        prefetcher.queue(URLS)
+        while len(saved) < len(URLS):
+            time.sleep(0.05)
+        calls = list(loader.calls)
+        html = prefetcher.html(URLS[1])
+    assert calls == URLS
+    assert saved == URLS
+    # Served from the prefetched page, no call
+    assert loader.calls == URLS
+    assert html == ReplayLoader().html(URLS[1])
+
+def test_foreground_goes_first():
+    loader = ThrottledLoader()
+    foreground = "/ageofempires/TheViper/Results"
+    prefetcher = Prefetcher(loader)
+    prefetcher.queue(URLS * 3)
+    prefetcher.start()
+    while not loader.calls:
+        time.sleep(0.01)
+    started = time.perf_counter()
+    prefetcher.html(foreground)
+    waited = time.perf_counter() - started
+    prefetcher.stop()
+    # Next call after the prefetch already made, at most one throttle wait
+    assert loader.calls[1] == foreground
+    assert waited < 2 * THROTTLE
+    assert len(loader.calls) < 3 * len(URLS) + 1
+
+def test_failed_prefetch():
+    loader = ThrottledLoader()
+    done = threading.Event()
+    with Prefetcher(loader, handler=lambda path, html: done.set()) as prefetcher:
+        prefetcher.queue(["/ageofempires/Not_Recorded", URLS[0]])
+        assert done.wait(5)
+    assert list(prefetcher.failed) == ["/ageofempires/Not_Recorded"]
+    assert prefetcher.failed["/ageofempires/Not_Recorded"].code == 404
+    assert prefetcher.prefetched(URLS[0])
+
+def test_streaming_waits_its_turn():
+    loader = ThrottledLoader()
+    loader.streaming = True
+    foreground = "/ageofempires/TheViper/Results"
+    with Prefetcher(loader) as prefetcher:
+        assert prefetcher.streaming
+        prefetcher.queue(URLS)
+        while not loader.calls:
+            time.sleep(0.01)
+        chunks = prefetcher.stream(foreground)
+        first = next(chunks)
+        # The background waits while the page is read
+        time.sleep(2 * THROTTLE)
+        assert loader.calls == [URLS[0], foreground]
+        html = first + "".join(chunks)
+        prefetcher.queue([])
+    assert html == ReplayLoader().html(foreground)
+    # A prefetched page streams without a call
+    assert "".join(prefetcher.stream(URLS[0])) == ReplayLoader().html(URLS[0])
+    assert loader.calls.count(URLS[0]) == 1
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+""" Tests prize and placement parsing"""
+from liquiaoe.loaders import VcrLoader
+from liquiaoe.managers import PlayerManager, Tournament, TournamentManager
+from liquiaoe.prizes import earnings, earnings_by_season, parse_place, parse_prize
+
+
+def test_parse_prize():
+    assert parse_prize("$20,000\xa0USD") == (20000.0, "USD")
+    assert parse_prize("$812.50") == (812.5, "USD")
+    assert parse_prize("€1.500\xa0EUR") == (1500.0, "EUR")
+    assert parse_prize("$5,000 + TBD") == (5000.0, "USD")
+    assert parse_prize("1.000.000 ₩") == (1000000.0, "KRW")
+    assert parse_prize("$2,141.78") == (2141.78, "USD")
+    assert parse_prize("12,50 €") == (12.5, "EUR")
+    assert parse_prize("€300") == (300.0, "EUR")
+    assert parse_prize("") == (0.0, "")
+    assert parse_prize("-") == (0.0, "")
+
+def test_parse_place():
+    assert parse_place("1st") == (1, 1)
+    assert parse_place("3rd\xa0-\xa04th") == (3, 4)
+    assert parse_place("33rd-64th") == (33, 64)
+    assert parse_place("") == (0, 0)
+
+def test_prize_table():
+    loader = VcrLoader()
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    assert tournament.prize_amount == 25000.0
+    table = tournament.prize_table
+    idx = table.keys.index("Capoch")
+    assert (table.low[idx], table.high[idx]) == (5, 8)
+    assert table.amounts[idx] == 812.5
+    totals = earnings([tournament])
+    assert totals["Capoch"] == 812.5
+    assert round(table.total()) == round(sum(totals.values()))
+
+def test_portal_prizes():
+    manager = TournamentManager(VcrLoader())
+    tournament = manager.all()[5]
+    assert tournament.prize_amount == 100.0
+    assert tournament.prize_currency == "USD"
+
+def test_earnings_by_season():
+    tournaments = PlayerManager(VcrLoader()).tournaments("/ageofempires/TheViper")
+    seasons = earnings_by_season(tournaments)
+    assert seasons[2022] >= 1500
+    assert round(sum(seasons.values()), 2) == round(sum(t.loader_prize_amount for t in tournaments), 2)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+""" Tests head-to-head records and ratings"""
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from liquiaoe.identity import PLAYERS
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import MatchResult, MatchResultsManager, Tournament
+from liquiaoe.ratings import INITIAL_RATING, MatchStats, expected_score
+
+
+def result(winner, loser, day=1, tournament="/ageofempires/Cup", played=True):
+    return MatchResult.from_dict({"winner": winner, "loser": loser, "winner_url": None,
+                                  "loser_url": None, "date": "2023-05-{:02}".format(day),
+                                  "tournament": tournament, "played": played,
+                                  "score": "2-1", "game": None})
+
+@pytest.fixture
+def loaded():
+    loader = ReplayLoader()
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    return tournament.matches + MatchResultsManager(loader).match_results
+
+def test_expected_score():
+    assert expected_score(1500, 1500) == 0.5
+    assert round(expected_score(1900, 1500), 3) == round(10 / 11, 3)
+
+def test_head_to_head():
+    stats = MatchStats()
+    assert stats.add(result("Hera", "TheViper", 1))
+    assert stats.add(result("TheViper", "Hera", 2))
+    assert stats.add(result("Hera", "TheViper", 3, "/ageofempires/Other_Cup"))
+    # Seen again (player page, matches portal...)
+    assert not stats.add(result("Hera", "TheViper", 1))
+    assert not stats.add(result("Hera", "Liereyy", 4, played=False))
+    assert len(stats) == 3
+    assert stats.head_to_head("Hera", "TheViper") == (2, 1)
+    assert stats.head_to_head("TheViper", "Hera") == (1, 2)
+    assert stats.head_to_head("Hera", "Nobody") == (0, 0)
+    assert stats.games("Hera") == 3
+    assert stats.rating("Hera") > INITIAL_RATING > stats.rating("TheViper")
+    assert stats.rating("Nobody") == INITIAL_RATING
+    assert "Liereyy" not in stats
+
+def test_changed_result():
+    stats = MatchStats()
+    stats.add(result("Hera", "TheViper", 1))
+    stats.add(result("TheViper", "Liereyy", 2))
+    # The first result was entered the wrong way around
+    assert stats.add(result("TheViper", "Hera", 1))
+    assert stats.head_to_head("Hera", "TheViper") == (0, 1)
+    expected = MatchStats()
+    expected.add_all([result("TheViper", "Hera", 1), result("TheViper", "Liereyy", 2)])
+    assert stats.ranking() == expected.ranking()
+    # Then turns out a forfeit
+    assert stats.add(result("TheViper", "Hera", 1, played=False))
+    assert stats.head_to_head("Hera", "TheViper") == (0, 0)
+    assert len(stats) == 1 and stats.games("Hera") == 0
+
+def test_names_resolved():
+    PLAYERS.clear()
+    PLAYERS.add("TheViper", "/ageofempires/TheViper", ("The Viper",))
+    stats = MatchStats()
+    stats.add(result("The Viper", "Hera", 1))
+    stats.add(result("TheViper", "Hera", 2))
+    assert stats.head_to_head("TheViper", "Hera") == stats.head_to_head("The Viper", "Hera") == (2, 0)
+    PLAYERS.clear()
+
+def test_incremental_matches_loops(loaded):
+    stats = MatchStats()
+    assert stats.add_all(loaded) == sum(match.played for match in loaded)
+    assert stats.add_all(loaded) == 0
+    counts = Counter((match.winner, match.loser) for match in loaded if match.played)
+    for (winner, loser), wins in counts.items():
+        assert stats.head_to_head(winner, loser)[0] == wins
+    ranking = stats.ranking()
+    assert ranking[0][0] == "TheViper"
+    assert round(sum(rating for _, rating in ranking)) == round(INITIAL_RATING * len(ranking))
+
+def test_rebuild(loaded):
+    ordered = sorted(loaded, key=lambda match: match.date or date.min)
+    incremental = MatchStats()
+    incremental.add_all(ordered)
+    rebuilt = MatchStats()
+    rebuilt.add(result("Hera", "TheViper"))
+    rebuilt.rebuild(ordered)
+    assert len(rebuilt) == len(incremental)
+    assert rebuilt.head_to_head("Hera", "TheViper") == (0, 0)
+    assert dict(rebuilt.ranking()) == pytest.approx(dict(incremental.ranking()))
+    # Replayed by date whatever the order given
+    rebuilt.rebuild(sorted(ordered, key=lambda match: match.date or date.min, reverse=True))
+    assert rebuilt.ranking()[0][0] == incremental.ranking()[0][0]
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+""" Tests SQLite store"""
+from datetime import date
+
+import pytest
+
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import (MatchResultsManager, PlayerManager, Tournament, TournamentManager,
+                               Transfer, TransferManager)
+from liquiaoe.store import Store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Store(str(tmp_path / "liquiaoe.db"))
+    yield store
+    store.close()
+
+class NoLoader:
+    def html(self, path):
+        raise AssertionError("loaded {}".format(path))
+
+def test_tournament_manager_store(store):
+    manager = TournamentManager(ReplayLoader(), store=store)
+    assert store.has_page(manager.url)
+    warm = TournamentManager(NoLoader(), store=store)
+    assert [t.to_dict() for t in warm.all()] == [t.to_dict() for t in manager.all()]
+    timebox = (date(2023, 5, 25), date(2023, 5, 31),)
+    for query in ("completed", "starting", "ending", "ongoing"):
+        expected = getattr(manager, query)(timebox)
+        stored = getattr(store, query)(timebox)
+        assert {game: sorted(t.url for t in tournaments) for game, tournaments in stored.items()} == \
+            {game: sorted(t.url for t in tournaments) for game, tournaments in expected.items()}
+    assert len(store.completed(timebox)["Age of Empires IV"]) == 5
+
+def test_upsert(store):
+    manager = TournamentManager(ReplayLoader(), store=store)
+    count = len(store.tournaments())
+    manager.refresh()
+    assert len(store.tournaments()) == count
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(ReplayLoader())
+    store.save_tournament(tournament)
+    store.save_tournament(tournament)
+    stored = store.tournament("/ageofempires/Wandering_Warriors_Cup")
+    assert stored.first_place == "TheViper"
+    assert stored.bracket.alive() == {"TheViper"}
+    history = store.player_history("TheViper")
+    assert len(history) == len([match for match in tournament.matches if "TheViper" in (match.winner, match.loser)])
+    assert history[0].tournament == "/ageofempires/Wandering_Warriors_Cup"
+
+def test_portal_keeps_loaded_page(store):
+    loader = ReplayLoader()
+    tournament = Tournament("/ageofempires/AoE2_Admirals_League/2")
+    tournament.load_advanced(loader)
+    store.save_tournament(tournament)
+    TournamentManager(loader, store=store)
+    stored = store.tournament("/ageofempires/AoE2_Admirals_League/2")
+    assert stored.loaded
+    assert len(stored.participants) == 32
+    assert len(stored.matches) == len(tournament.matches)
+    assert stored.organizers == ['Admirals Esports']
+    assert stored.game == "Age of Empires II"
+    lazy = TournamentManager(loader, lazy=True, store=store)
+    by_url = {t.url: t for t in lazy.all()}
+    assert by_url["/ageofempires/AoE2_Admirals_League/2"].organizers == ['Admirals Esports']
+    unloaded = by_url["/ageofempires/Rising_Empires_League/1/Division/1"]
+    assert not unloaded.loaded
+    assert unloaded.organizers
+    assert unloaded.loaded
+
+def test_merge_flags(store):
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.name = "Wandering Warriors Cup"
+    tournament.cancelled = True
+    store.save_tournament(tournament)
+    again = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    store.save_tournament(again)
+    stored = store.tournament("/ageofempires/Wandering_Warriors_Cup")
+    assert stored.name == "Wandering Warriors Cup"
+    assert not stored.cancelled
+
+def test_player_store(store):
+    viper = PlayerManager(ReplayLoader(), store=store).tournaments("/ageofempires/TheViper")
+    matches = PlayerManager(ReplayLoader(), store=store).matches("/ageofempires/JorDan_AoE")
+    manager = PlayerManager(NoLoader(), store=store)
+    assert [t.to_dict() for t in manager.tournaments("/ageofempires/TheViper")] == [t.to_dict() for t in viper]
+    assert manager.tournaments("/ageofempires/TheViper")[68].end == date(2022, 1, 23)
+    assert manager.matches("/ageofempires/JorDan_AoE")[58].to_dict() == matches[58].to_dict()
+
+def test_transfers_and_results(store):
+    transfers = TransferManager(ReplayLoader()).transfers
+    store.save_transfers(transfers)
+    store.save_transfers(transfers)
+    stored = store.transfers()
+    assert len(stored) == len(transfers)
+    assert {t.key for t in stored} == {t.key for t in transfers}
+    assert [t.date for t in stored] == sorted((t.date for t in transfers), reverse=True)
+    assert len(store.transfers(date(2023, 5, 1), date(2023, 5, 31))) == \
+        len([t for t in transfers if date(2023, 5, 1) <= t.date <= date(2023, 5, 31)])
+
+def test_undated_transfer(store):
+    undated = Transfer.from_dict({"date": None, "players": [("Hera", "/ageofempires/Hera")],
+                                  "old": None, "new": "Aftermath", "ref": None})
+    dated = TransferManager(ReplayLoader()).transfers[:2]
+    store.save_transfers(dated + [undated])
+    stored = store.transfers()
+    assert [t.key for t in stored] == [t.key for t in dated] + [undated.key]
+    assert stored[-1].date is None
+    assert len(store.transfers(date(2023, 1, 1))) == 2
+    store.save_match_results(MatchResultsManager(ReplayLoader()).match_results)
+    history = store.player_history("JorDan_AoE", date(2023, 5, 31), date(2023, 5, 31))
+    assert history[0].loser == "Prydz"
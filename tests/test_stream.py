@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+""" Tests row by row parsing of streamed pages"""
+import json
+import tracemalloc
+
+import pytest
+
+from liquiaoe.loaders import ReplayLoader, RequestsException
+from liquiaoe.managers import PlayerManager, TournamentManager
+from liquiaoe.stream import RowExtractor, page_text, stream_rows
+
+PORTAL = "/ageofempires/Age_of_Empires_II/Tournaments/Pre_2020"
+
+
+@pytest.fixture
+def streaming_loader():
+    loader = ReplayLoader()
+    loader.streaming = True
+    return loader
+
+def pieces(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+def test_page_text():
+    html = '<div class="a">é "quoted" \\ – \U0001f600 \n</div>'
+    for ensure_ascii in (True, False):
+        body = json.dumps({"parse": {"title": "X", "text": {"*": html}, "links": []}},
+                          ensure_ascii=ensure_ascii).replace(": ", ":").encode("utf-8")
+        # Every escape and utf-8 sequence cut somewhere
+        for size in (1, 2, 3, 5, 7, 64):
+            assert "".join(page_text(pieces(body, size))) == html
+
+def test_page_text_errors():
+    missing = json.dumps({"error": {"code": "missingtitle", "info": "The page doesn't exist."}})
+    with pytest.raises(RequestsException) as ex:
+        list(page_text(pieces(missing.encode("utf-8"), 10)))
+    assert ex.value.code == 404
+    with pytest.raises(RequestsException) as ex:
+        list(page_text([b'{"parse":{"text":{"*":"<div>']))
+    assert ex.value.code == 500
+
+def test_loader_stream():
+    loader = ReplayLoader()
+    html = loader.html("/ageofempires/Wrang_of_Fire/3")
+    assert "".join(loader.stream("/ageofempires/Wrang_of_Fire/3", chunk_size=1000)) == html
+
+def test_row_extractor():
+    html = ('<table class="other"><tr><td>no</td></tr></table>'
+            '<div><table class="wikitable sortable"><tr><th>h</th></tr>'
+            '<tr class="x"><td>a &amp; b<br/></td><td><table><tr><td>in</td></tr></table></td></tr>'
+            '</table></div><table class="wikitable"><tr><td>second</td></tr></table>')
+    rows = list(stream_rows(pieces(html, 4), RowExtractor("wikitable", "tr")))
+    assert [(container, row.text) for container, row in rows] == [(1, "h"), (1, "a & bin"), (2, "second")]
+    assert len(rows[1][1].find_all("td")) == 3
+    extractor = RowExtractor("wikitable", "tr", first_only=True)
+    assert len(list(stream_rows(pieces(html, 4), extractor))) == 2
+    assert extractor.done
+
+def test_stream_portal(streaming_loader):
+    expected = [tournament.to_dict() for tournament in TournamentManager(ReplayLoader(), PORTAL).all()]
+    streamed = [tournament.to_dict() for tournament in TournamentManager(streaming_loader, PORTAL).all()]
+    assert streamed == expected
+    assert len(streamed) == 562
+
+def test_stream_player_pages(streaming_loader):
+    for player in ("/ageofempires/TheViper", "/ageofempires/Kongensgade"):
+        expected = [tournament.to_dict() for tournament in PlayerManager(ReplayLoader()).tournaments(player)]
+        assert [tournament.to_dict() for tournament in
+                PlayerManager(streaming_loader).tournaments(player)] == expected
+    expected = [match.to_dict() for match in PlayerManager(ReplayLoader()).matches("/ageofempires/JorDan_AoE")]
+    assert [match.to_dict() for match in
+            PlayerManager(streaming_loader).matches("/ageofempires/JorDan_AoE")] == expected
+
+def test_stream_memory(streaming_loader):
+    peaks = []
+    for loader in (ReplayLoader(), streaming_loader):
+        tracemalloc.start()
+        PlayerManager(loader).tournaments("/ageofempires/TheViper")
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    # The stored response itself is still read whole
+    assert peaks[1] < peaks[0] / 3
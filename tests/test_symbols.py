@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Tests the shared string table"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import (MatchResult, MatchResultsManager, PlayerManager, Tournament,
+                               TournamentManager, Transfer, TransferManager)
+from liquiaoe.symbols import SYMBOLS, SymbolTable, symbol, symbol_id
+
+
+def copy(text):
+    """Equal string that is not the same object."""
+    return "".join(list(text))
+
+def test_symbol_table():
+    table = SymbolTable()
+    tier = table.intern(copy("S-Tier"))
+    assert tier == "S-Tier"
+    assert table.intern(copy("S-Tier")) is tier
+    assert table.intern(None) is None
+    assert table.intern(3) == 3
+    assert table.id_of("S-Tier") == 0
+    assert table.id_of("A-Tier") == 1
+    assert table.string(1) == "A-Tier"
+    assert table.ids(["A-Tier", None, "B-Tier", "S-Tier"]) == [1, None, 2, 0]
+    assert len(table) == 3
+    assert "B-Tier" in table and "C-Tier" not in table
+
+def test_threads():
+    table = SymbolTable()
+    texts = [str(idx % 100) for idx in range(10000)]
+    with ThreadPoolExecutor(8) as pool:
+        ids = list(pool.map(table.id_of, texts))
+    assert len(table) == 100
+    assert [table.string(symbol_id) for symbol_id in ids] == texts
+
+def test_models_share_strings():
+    loader = ReplayLoader()
+    portal = TournamentManager(loader).all()
+    player = PlayerManager(loader).tournaments("/ageofempires/TheViper")
+    games = {id(tournament.game) for tournament in portal + player}
+    assert len(games) == len({tournament.game for tournament in portal + player})
+    tiers = {id(tournament.tier) for tournament in portal + player}
+    assert len(tiers) == len({tournament.tier for tournament in portal + player})
+
+    # Including what comes back from json (store, parse cache)
+    loaded = Tournament.from_dict(json.loads(json.dumps(portal[5].to_dict())))
+    assert loaded.game is portal[5].game
+    assert loaded.url is symbol(portal[5].url)
+
+    tournament = Tournament("/ageofempires/Wandering_Warriors_Cup")
+    tournament.load_advanced(loader)
+    assert all(player[0] is symbol(player[0]) for player in tournament.participant_lookup.values())
+    match = tournament.matches[0]
+    assert match.winner is symbol(match.winner)
+    assert MatchResult.from_dict(json.loads(json.dumps(match.to_dict()))).winner is match.winner
+
+    transfer = TransferManager(loader).transfers[0]
+    assert Transfer.from_dict(json.loads(json.dumps(transfer.to_dict()))).players[0][0] is transfer.players[0][0]
+    result = MatchResultsManager(loader).match_results[0]
+    assert result.tournament is symbol(result.tournament)
+
+def test_column_ids():
+    loader = ReplayLoader()
+    manager = PlayerManager(loader)
+    tournaments = manager.tournaments("/ageofempires/TheViper")
+    ids = SYMBOLS.ids([tournament.game for tournament in tournaments])
+    assert len(set(ids)) == len({tournament.game for tournament in tournaments})
+    assert SYMBOLS.string(ids[68]) == "Age of Empires IV"
+    assert symbol_id("Age of Empires IV") == ids[68]
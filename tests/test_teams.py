@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+""" Tests the team roster timeline"""
+from datetime import date
+
+from liquiaoe.loaders import ReplayLoader
+from liquiaoe.managers import Tournament, Transfer, TransferManager
+from liquiaoe.teams import TeamIndex, member_key, team_key
+
+
+def transfer(day, players, old=None, new=None):
+    return Transfer.from_dict({"date": day.isoformat(), "old": old, "new": new, "ref": None,
+                               "players": [(player, "/ageofempires/{}".format(player))
+                                           for player in players]})
+
+def test_keys():
+    assert team_key("Team Maswi") == team_key("Team_Maswi") == "Team_Maswi"
+    assert team_key("1_Fuchs_%26_Kokosnuss") == team_key("1 Fuchs & Kokosnuss")
+    assert team_key(None) is None
+    assert member_key("BL4CK", "/ageofempires/Bl4ck") == "Bl4ck"
+    assert member_key("Lucho", None) == "Lucho"
+
+def test_roster_timeline():
+    loader = ReplayLoader()
+    tournament = Tournament("/ageofempires/Empire_Wars_Duo/2")
+    tournament.load_advanced(loader)
+    index = TeamIndex()
+    assert index.add_tournament(tournament)
+    assert not index.add_tournament(tournament)
+    assert "GamerLegion A" in index
+    start = date(2021, 8, 21)
+    assert index.roster("GamerLegion A", start) == {"JorDan_AoE", "TaToH", "Nili"}
+    assert index.roster("GamerLegion A", date(2021, 8, 20)) == set()
+
+    # Added out of order
+    assert index.add_transfers([
+        transfer(date(2022, 3, 1), ["Nili"], new="GamerLegion A"),
+        transfer(date(2021, 10, 1), ["Nili", "TaToH"], old="GamerLegion A", new="Aftermath A"),
+    ]) == 2
+    assert not index.add_transfer(transfer(date(2021, 10, 1), ["Nili", "TaToH"],
+                                           old="GamerLegion A", new="Aftermath A"))
+    assert index.roster("GamerLegion A", date(2021, 9, 30)) == {"JorDan_AoE", "TaToH", "Nili"}
+    assert index.roster("GamerLegion A", date(2021, 10, 1)) == {"JorDan_AoE"}
+    assert index.roster("GamerLegion A", date(2022, 3, 1)) == {"JorDan_AoE", "Nili"}
+    assert index.roster("Aftermath A", date(2021, 10, 1)) == {"MbL", "Nicov", "Nili", "TaToH"}
+    assert index.members("GamerLegion A") == {"JorDan_AoE", "TaToH", "Nili"}
+
+    assert index.teams("Nili") == ["GamerLegion_A", "Aftermath_A"]
+    assert index.teams_on("Nili", date(2021, 9, 1)) == {"GamerLegion_A"}
+    assert index.teams_on("Nili", date(2021, 12, 1)) == {"Aftermath_A"}
+    assert index.teams_on("Nili", date(2022, 6, 1)) == {"GamerLegion_A", "Aftermath_A"}
+    assert index.teams("Nobody") == []
+    assert index.roster("Nobody's team", start) == set()
+
+def test_portal_transfers():
+    transfers = TransferManager(ReplayLoader()).transfers
+    index = TeamIndex()
+    assert index.add_transfers(transfers) == len({item.key for item in transfers if item.date})
+    moved = transfers[2]
+    player = member_key(*moved.players[0])
+    assert index.roster(moved.new, moved.date) == {player}
+    assert team_key(moved.new) in index.teams(player)
+
+def test_tournament_rosters_are_snapshots():
+    def tournament(url, day, teams):
+        listed = Tournament(url)
+        listed.start = day
+        listed.teams = {name: {"name": name, "url": name.replace(" ", "_").replace("&", "%26"),
+                               "members": [(player, None) for player in players]}
+                        for name, players in teams.items()}
+        return listed
+
+    index = TeamIndex()
+    index.add_tournament(tournament("/ageofempires/Cup/2", date(2022, 6, 1),
+                                    {"1 Fuchs & Kokosnuss": ["Fuchs", "Kokosnuss"]}))
+    index.add_tournament(tournament("/ageofempires/Cup/1", date(2022, 1, 1),
+                                    {"1 Fuchs & Kokosnuss": ["Fuchs", "Hase"]}))
+    index.add_transfer(transfer(date(2022, 3, 1), ["Igel"], new="1 Fuchs & Kokosnuss"))
+    assert index.roster("1 Fuchs & Kokosnuss", date(2022, 1, 1)) == {"Fuchs", "Hase"}
+    assert index.roster("1 Fuchs & Kokosnuss", date(2022, 3, 1)) == {"Fuchs", "Hase", "Igel"}
+    # Not listed any more
+    assert index.roster("1_Fuchs_%26_Kokosnuss", date(2022, 6, 1)) == {"Fuchs", "Kokosnuss"}
+    assert index.members("1 Fuchs & Kokosnuss") == {"Fuchs", "Hase", "Igel", "Kokosnuss"}
+    assert index.teams_on("Hase", date(2022, 2, 1)) == {"1_Fuchs_&_Kokosnuss"}
+    assert index.teams_on("Hase", date(2022, 7, 1)) == set()
+    assert index.teams("Hase") == ["1_Fuchs_&_Kokosnuss"]